@@ -0,0 +1,84 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from api_yamdb.replicas import use_primary_if_pinned
+
+
+class UserCache:
+    """ Ограниченный LRU-кэш пользователей с временем жизни записей
+    """
+
+    def __init__(self, max_size, timeout):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires, user = item
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.timeout, user)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE['MAX_SIZE'],
+    timeout=settings.USER_CACHE['TIMEOUT'],
+)
+
+
+def detached_copy(user):
+    # Каждый запрос получает свой экземпляр, общий остается в кэше
+    clone = copy.copy(user)
+    clone._state = copy.copy(user._state)
+    clone._state.fields_cache = {}
+    return clone
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """ JWT-аутентификация без запроса пользователя к базе на каждый вызов
+
+    Записи сбрасываются сигналами при изменении или удалении
+    пользователя в этом процессе, в остальных живут не дольше TIMEOUT.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            use_primary_if_pinned(result[0].pk)
+        return result
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(user_id, user)
+        return detached_copy(user)
@@ -0,0 +1,147 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.urls import Resolver404, resolve
+
+from api_yamdb import replicas
+
+from .renderers import FastJSONRenderer
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Заголовки внешнего запроса, которые не относятся к вложенным
+SKIPPED_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IF_NONE_MATCH',
+                'HTTP_IF_MODIFIED_SINCE')
+
+renderer = FastJSONRenderer()
+executor_lock = threading.Lock()
+executor = None
+
+
+def get_executor():
+    # Один ограниченный пул на процесс: соединений с базой у параллельных
+    # чтений не больше BATCH_MAX_WORKERS
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(settings.BATCH_MAX_WORKERS,
+                                          thread_name_prefix='batch')
+    return executor
+
+
+def build_request(request, method, path, body=None):
+    """ Вложенный запрос с пользователем внешнего запроса
+
+    Пользователь уже определен, поэтому токен заново не проверяется.
+    """
+    url = urlsplit(path)
+    content = b'' if body is None else renderer.render(body)
+    meta = {key: value for key, value in request.META.items()
+            if key not in SKIPPED_META}
+    meta.update({
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': url.path,
+        'QUERY_STRING': url.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.input': io.BytesIO(content),
+        'wsgi.url_scheme': request.scheme,
+    })
+    sub_request = WSGIRequest(meta)
+    # Анонимный запрос проходит обычную проверку, чтобы получить тот же
+    # ответ 401, что и без пакета
+    if request.user.is_authenticated:
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+    return sub_request
+
+
+def error_body(status, detail):
+    return status, renderer.render({'detail': detail})
+
+
+def dispatch(request, item, exclude):
+    """ Выполняет вложенный запрос, возвращает (статус, JSON тела)
+    """
+    sub_request = build_request(request, item['method'], item['path'],
+                                item.get('body'))
+    try:
+        match = resolve(sub_request.path_info)
+    except Resolver404:
+        return error_body(404, 'Страница не найдена.')
+    if getattr(match.func, 'cls', None) in exclude:
+        return error_body(400, 'Этот адрес нельзя вызывать в пакете.')
+
+    try:
+        response = match.func(sub_request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Exception as exc:
+        response = response_for_exception(sub_request, exc)
+    if response.streaming:
+        return error_body(400, 'Потоковые ответы в пакете не отдаются.')
+    content_type = response.get('Content-Type', '')
+    if not response.content or \
+            not content_type.startswith('application/json'):
+        return response.status_code, b'null'
+    return response.status_code, response.content
+
+
+def run_batch(request, items, parallel=False, exclude=()):
+    """ Выполняет вложенные запросы по порядку
+
+    С parallel идущие подряд чтения выполняются одновременно в пуле
+    потоков, запись выполняется отдельно и после предыдущих запросов.
+    Пакет из одних чтений читает из реплики, как обычный GET.
+    """
+    results = [None] * len(items)
+    if all(item['method'] in SAFE_METHODS for item in items):
+        replicas.read_only_request(request)
+
+    def run(index):
+        results[index] = dispatch(request, items[index], exclude)
+
+    def run_in_pool(index, replica):
+        # Потоки пула читают из той же базы, что и поток запроса
+        replicas.state.replica = replica
+        replicas.state.wrote = False
+        try:
+            run(index)
+        finally:
+            replicas.state.replica = None
+            close_old_connections()
+
+    reads = []
+
+    def flush():
+        if len(reads) > 1:
+            replica = replicas.current_replica()
+            list(get_executor().map(run_in_pool, reads,
+                                    [replica] * len(reads)))
+        elif reads:
+            run(reads[0])
+        reads.clear()
+
+    for index, item in enumerate(items):
+        if parallel and item['method'] in SAFE_METHODS:
+            reads.append(index)
+            continue
+        flush()
+        run(index)
+    flush()
+    return results
+
+
+def render_results(results):
+    # Тела уже в JSON и вставляются без повторного разбора
+    return b'[' + b','.join(
+        b'{"status":%d,"body":%s}' % (status, body)
+        for status, body in results
+    ) + b']'
@@ -0,0 +1,265 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connections, router, transaction
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import empty
+from rest_framework.response import Response
+
+from . import caching, facets
+from .parsers import FastJSONParser, NDJSONParser
+from .permissions import IsAdminRole
+
+BULK_BATCH_SIZE = 1000
+NOT_FOUND = 'Объект не найден.'
+
+
+class BulkWriteMixin:
+    """ Массовые создание, изменение и удаление для администраторов
+
+    Тело запроса - JSON-массив или NDJSON. Связанные объекты ищутся
+    по slug одним запросом на модель, ошибки возвращаются по индексу
+    элемента и не мешают сохранить остальные элементы. С bulk_facets
+    сводка фасетов сдвигается на разницу вклада записанных произведений
+    до и после записи.
+    """
+    bulk_serializer_class = None
+    bulk_lookup = 'slug'
+    bulk_key_field = serializers.SlugField()
+    bulk_unique = ()
+    # Поле -> (модель, много значений)
+    bulk_relations = {}
+    bulk_table = None
+    bulk_facets = False
+
+    @action(detail=False, methods=['POST', 'PATCH', 'DELETE'],
+            permission_classes=[IsAdminRole],
+            parser_classes=[FastJSONParser, NDJSONParser])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Ожидается массив объектов.')
+        if len(items) > settings.BULK_MAX_ITEMS:
+            raise ValidationError(
+                f'Не больше {settings.BULK_MAX_ITEMS} объектов за запрос.'
+            )
+        write = {
+            'POST': self.create_many,
+            'PATCH': self.update_many,
+            'DELETE': self.delete_many,
+        }[request.method]
+        errors = {}
+        try:
+            with transaction.atomic(), facets.tracking_paused():
+                done = write(items, errors)
+                if done:
+                    self.bulk_written([key for _, key in done])
+        except IntegrityError:
+            # Параллельная запись заняла те же значения
+            raise ValidationError('Конфликт при записи, повторите запрос.')
+        return Response({
+            'count': len(done),
+            'results': [{'index': index, self.bulk_lookup: key}
+                        for index, key in done],
+            'errors': [{'index': index, 'errors': errors[index]}
+                       for index in sorted(errors)],
+        })
+
+    @property
+    def bulk_model(self):
+        return self.queryset.model
+
+    def bulk_facet_counts(self, pks):
+        if not self.bulk_facets:
+            return Counter()
+        return facets.title_counts(pks, lock=True)
+
+    def bulk_validate(self, items, errors, partial=False):
+        valid = []
+        for index, item in items:
+            serializer = self.bulk_serializer_class(data=item,
+                                                    partial=partial)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                errors[index] = serializer.errors
+        return valid
+
+    def bulk_keys(self, items, errors):
+        """ Значения bulk_lookup элементов: из объекта или само значение
+        """
+        keys = {}
+        for index, item in enumerate(items):
+            value = item.get(self.bulk_lookup, empty) \
+                if isinstance(item, dict) else item
+            try:
+                keys[index] = self.bulk_key_field.run_validation(value)
+            except serializers.ValidationError as error:
+                errors[index] = {self.bulk_lookup: error.detail}
+        return keys
+
+    def bulk_check_unique(self, valid, errors):
+        for field in self.bulk_unique:
+            values = {data[field] for _, data in valid}
+            taken = set(self.bulk_model.objects.filter(
+                **{f'{field}__in': values}
+            ).values_list(field, flat=True))
+            unique = []
+            for index, data in valid:
+                if data[field] in taken:
+                    errors[index] = {field: ['Значение уже занято.']}
+                    continue
+                taken.add(data[field])
+                unique.append((index, data))
+            valid = unique
+        return valid
+
+    def bulk_resolve(self, valid, errors):
+        """ Заменяет slug связанных объектов объектами
+        """
+        found = {}
+        for name, (model, many) in self.bulk_relations.items():
+            slugs = set()
+            for _, data in valid:
+                value = data.get(name)
+                if value is not None:
+                    slugs.update(value if many else [value])
+            found[name] = model.objects.in_bulk(
+                slugs, field_name='slug'
+            ) if slugs else {}
+
+        resolved = []
+        for index, data in valid:
+            item_errors = {}
+            for name, (model, many) in self.bulk_relations.items():
+                value = data.get(name)
+                if value is None:
+                    continue
+                slugs = list(dict.fromkeys(value)) if many else [value]
+                missing = [slug for slug in slugs if slug not in found[name]]
+                if missing:
+                    item_errors[name] = [
+                        f'Объект с slug={slug} не существует.'
+                        for slug in missing
+                    ]
+                    continue
+                objects = [found[name][slug] for slug in slugs]
+                data[name] = objects if many else objects[0]
+            if item_errors:
+                errors[index] = item_errors
+            else:
+                resolved.append((index, data))
+        return resolved
+
+    def bulk_fields(self, data):
+        return {name: value for name, value in data.items()
+                if not self.bulk_relations.get(name, (None, False))[1]}
+
+    def bulk_set_many(self, changed, replace=False):
+        """ Связи многие ко многим одной вставкой на поле
+        """
+        for name, (model, many) in self.bulk_relations.items():
+            if not many:
+                continue
+            field = self.bulk_model._meta.get_field(name)
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            pairs = [(obj, data[name]) for obj, data in changed
+                     if name in data]
+            if replace and pairs:
+                through.objects.filter(**{
+                    f'{source}__in': [obj.pk for obj, _ in pairs]
+                }).delete()
+            through.objects.bulk_create([
+                through(**{f'{source}_id': obj.pk,
+                           f'{target}_id': related.pk})
+                for obj, related_objects in pairs
+                for related in related_objects
+            ], batch_size=BULK_BATCH_SIZE)
+
+    def create_many(self, items, errors):
+        valid = self.bulk_validate(enumerate(items), errors)
+        valid = self.bulk_resolve(self.bulk_check_unique(valid, errors),
+                                  errors)
+        model = self.bulk_model
+        created = [(index, model(**self.bulk_fields(data)), data)
+                   for index, data in valid]
+        objects = [obj for _, obj, _ in created]
+        connection = connections[router.db_for_write(model)]
+        many = any(many for _, many in self.bulk_relations.values())
+        if many and not connection.features.can_return_rows_from_bulk_insert:
+            # Без RETURNING ключи вставленных строк неизвестны
+            for obj in objects:
+                obj.save()
+        else:
+            model.objects.bulk_create(objects, batch_size=BULK_BATCH_SIZE)
+        self.bulk_set_many([(obj, data) for _, obj, data in created])
+        facets.apply_facet_deltas(Counter(), self.bulk_facet_counts(
+            [obj.pk for obj in objects]
+        ))
+        return [(index, getattr(obj, self.bulk_lookup))
+                for index, obj, _ in created]
+
+    def update_many(self, items, errors):
+        keys = self.bulk_keys(items, errors)
+        existing = self.bulk_model.objects.in_bulk(
+            set(keys.values()), field_name=self.bulk_lookup
+        )
+        pks = [obj.pk for obj in existing.values()]
+        before = self.bulk_facet_counts(pks)
+        for index, key in keys.items():
+            if key not in existing:
+                errors[index] = {self.bulk_lookup: [NOT_FOUND]}
+        valid = self.bulk_validate(
+            [(index, items[index]) for index in keys if index not in errors],
+            errors, partial=True,
+        )
+        valid = self.bulk_resolve(valid, errors)
+
+        changed = []
+        fields = set()
+        for index, data in valid:
+            # Ключ элемента не меняется
+            data.pop(self.bulk_lookup, None)
+            obj = existing[keys[index]]
+            for name, value in self.bulk_fields(data).items():
+                setattr(obj, name, value)
+                fields.add(name)
+            changed.append((index, obj, data))
+        if fields:
+            objects = list({obj.pk: obj for _, obj, _ in changed}.values())
+            self.bulk_model.objects.bulk_update(objects, fields,
+                                                batch_size=BULK_BATCH_SIZE)
+        self.bulk_set_many([(obj, data) for _, obj, data in changed],
+                           replace=True)
+        facets.apply_facet_deltas(before, self.bulk_facet_counts(pks))
+        # bulk_update не отправляет сигналы, подписи сводки обновляются
+        facets.refresh_labels(self.bulk_model, [
+            keys[index] for index, _, _ in changed
+        ])
+        return [(index, keys[index]) for index, _, _ in changed]
+
+    def delete_many(self, items, errors):
+        keys = self.bulk_keys(items, errors)
+        objects = self.bulk_model.objects.filter(
+            **{f'{self.bulk_lookup}__in': set(keys.values())}
+        )
+        found = set(objects.values_list(self.bulk_lookup, flat=True))
+        for index, key in keys.items():
+            if key not in found:
+                errors[index] = {self.bulk_lookup: [NOT_FOUND]}
+        before = self.bulk_facet_counts(objects.values('pk'))
+        objects.delete()
+        facets.apply_facet_deltas(before, Counter())
+        return [(index, key) for index, key in keys.items()
+                if key in found]
+
+    def bulk_written(self, keys):
+        # bulk_create и bulk_update не отправляют сигналы моделей
+        caching.bump_versions_on_commit(self.bulk_table)
+        prefix = getattr(self, 'cache_prefix', None)
+        if prefix and self.bulk_lookup == 'id':
+            caching.invalidate_objects_on_commit(prefix, *keys)
@@ -0,0 +1,292 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+
+from .models import CatalogVersion
+
+CATEGORY = 'category'
+GENRE = 'genre'
+TITLE = 'title'
+RANKING = 'ranking'
+
+
+def bump_versions(*names):
+    now = timezone.now()
+    for name in names:
+        versions = CatalogVersion.objects.filter(name=name)
+        if versions.update(version=F('version') + 1, updated=now):
+            continue
+        try:
+            with transaction.atomic():
+                CatalogVersion.objects.create(name=name, version=1,
+                                              updated=now)
+        except IntegrityError:
+            versions.update(version=F('version') + 1, updated=now)
+
+
+def on_commit_once(func, *values):
+    """ Вызывает func(values) после фиксации транзакции
+
+    Значения повторных вызовов в той же транзакции добавляются
+    к уже запланированному вызову.
+    """
+    connection = transaction.get_connection()
+    for _, scheduled in connection.run_on_commit:
+        if getattr(scheduled, 'func', None) is func:
+            scheduled.args[0].update(values)
+            return
+    transaction.on_commit(partial(func, set(values)))
+
+
+def bump_pending_versions(names):
+    # Одинаковый порядок блокировок строк у параллельных транзакций
+    bump_versions(*sorted(names))
+
+
+def bump_versions_on_commit(*names):
+    """ Сдвигает версии таблиц после фиксации записи
+
+    Иначе параллельное чтение успеет закэшировать под новой версией
+    еще не зафиксированные данные.
+    """
+    on_commit_once(bump_pending_versions, *names)
+
+
+def get_versions(names):
+    """ Возвращает {таблица: (версия, время изменения)} одним запросом
+    """
+    rows = CatalogVersion.objects.filter(name__in=names).values_list(
+        'name', 'version', 'updated'
+    )
+    return {name: (version, updated) for name, version, updated in rows}
+
+
+class ConditionalGetMixin:
+    """ ETag и Last-Modified для чтения по счетчикам версий таблиц
+
+    Если клиент прислал актуальный ETag, ответ 304 отдается без
+    обращения к сериализатору.
+    """
+    cache_tables = ()
+
+    def get_cache_tables(self):
+        return self.cache_tables
+
+    def get_cache_versions(self):
+        tables = self.get_cache_tables()
+        versions = get_versions(tables)
+        return [versions.get(name, (0, None)) for name in tables]
+
+    def get_etag(self, request, versions):
+        source = '|'.join([
+            request.get_full_path(),
+            request.accepted_media_type,
+            *(str(version) for version, _ in versions),
+        ])
+        return quote_etag(hashlib.md5(source.encode()).hexdigest())
+
+    def conditional(self, handler, request, *args, **kwargs):
+        versions = self.get_cache_versions()
+        etag = self.get_etag(request, versions)
+        updated = [moment for _, moment in versions if moment is not None]
+        last_modified = (int(max(updated).timestamp())
+                         if len(updated) == len(versions) else None)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        self.patch_cache_headers(request, response)
+        return response
+
+    def patch_cache_headers(self, request, response):
+        # Страницы браузерного API содержат имя пользователя
+        if request.accepted_renderer.format == 'json':
+            patch_cache_control(response, public=True,
+                                max_age=settings.CATALOG_CACHE_MAX_AGE)
+        else:
+            patch_cache_control(response, private=True, max_age=0)
+        patch_vary_headers(response, ('Accept',))
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+
+HIT = 'hit'
+MISS = 'miss'
+STATS_KEY = 'response-cache:stats:{}'
+
+
+def count_response_cache(outcome):
+    key = STATS_KEY.format(outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def response_cache_stats():
+    values = cache.get_many([STATS_KEY.format(HIT), STATS_KEY.format(MISS)])
+    return {
+        HIT: values.get(STATS_KEY.format(HIT), 0),
+        MISS: values.get(STATS_KEY.format(MISS), 0),
+    }
+
+
+CLOCK_KEY = 'response-cache:clock'
+
+
+def generation_key(prefix, pk):
+    return f'response-cache:{prefix}:generation:{pk}'
+
+
+def next_generation():
+    """ Следующее значение общего счетчика сбросов
+
+    Счетчик начинается со времени в миллисекундах, чтобы после
+    вытеснения из кэша не вернуться к уже выданным значениям.
+    """
+    try:
+        return cache.incr(CLOCK_KEY)
+    except ValueError:
+        cache.add(CLOCK_KEY, int(time.time() * 1000), timeout=None)
+        return cache.incr(CLOCK_KEY)
+
+
+def invalidate_objects(keys):
+    """ Сбрасывает ответы по множеству пар (префикс, ключ) одной записью
+
+    Объект помечается номером сброса: ответы, рендеринг которых начался
+    раньше, больше не отдаются. Метка живет дольше любой записи ответа.
+    """
+    generation = next_generation()
+    cache.set_many({generation_key(prefix, pk): generation
+                    for prefix, pk in keys},
+                   timeout=2 * settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def invalidate_objects_on_commit(prefix, *pks):
+    """ Сбрасывает ответы по объектам после фиксации записи
+    """
+    on_commit_once(invalidate_objects, *((prefix, pk) for pk in pks))
+
+
+class ResponseCacheMixin:
+    """ Хранит готовый JSON списка и карточки объекта в кэше Django
+
+    Запись действительна, пока не сменились версии таблиц и ни один
+    объект ответа не сбрасывался invalidate_objects после начала ее
+    рендеринга. Объекты страницы списка запоминаются при разбиении на
+    страницы, поэтому отзыв сбрасывает только страницы и карточку
+    своего произведения. Карточка зависит только от версий таблиц
+    detail_cache_tables. ETag записи считается по тем же данным и не
+    меняется от записей в другие объекты.
+    """
+    cache_prefix = None
+    detail_cache_tables = ()
+
+    def get_cache_pk(self):
+        """ Ключ объекта из адреса в каноническом виде или None
+
+        Неканонические ключи (01, abc) в кэш не попадают.
+        """
+        model = self.queryset.model
+        field = (model._meta.pk if self.lookup_field == 'pk'
+                 else model._meta.get_field(self.lookup_field))
+        value = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            canonical = str(field.to_python(value))
+        except ValidationError:
+            return None
+        return canonical if canonical == value else None
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.cached_pks = [obj.pk for obj in page]
+        return page
+
+    def is_fresh(self, started, pks, found=None):
+        keys = [generation_key(self.cache_prefix, pk) for pk in pks]
+        if found is None:
+            found = cache.get_many(keys)
+        return all(found.get(key, started) <= started for key in keys)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        pk = None
+        if lookup in self.kwargs:
+            pk = self.get_cache_pk()
+            if pk is None:
+                return handler(request, *args, **kwargs)
+        if request.accepted_renderer.format != 'json':
+            return handler(request, *args, **kwargs)
+
+        versions = self.get_cache_versions()
+        if pk is None:
+            versions = tuple(version for version, _ in versions)
+        else:
+            tables = dict(zip(self.get_cache_tables(), versions))
+            versions = tuple(tables[name][0]
+                             for name in self.detail_cache_tables)
+        path = '|'.join([request.get_full_path(),
+                         request.accepted_media_type])
+        digest = hashlib.md5(path.encode()).hexdigest()
+        kind = 'list' if pk is None else f'detail:{pk}'
+        key = f'response-cache:{self.cache_prefix}:{kind}:{digest}'
+        keys = [key, CLOCK_KEY]
+        if pk is not None:
+            keys.append(generation_key(self.cache_prefix, pk))
+        found = cache.get_many(keys)
+
+        entry = found.get(key)
+        if entry is not None and entry[0] == versions and self.is_fresh(
+            entry[1], entry[2], found if pk is not None else None
+        ):
+            count_response_cache(HIT)
+            etag = entry[3]
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = HttpResponse(entry[4], content_type=entry[5])
+                response['X-Cache'] = 'HIT'
+        else:
+            count_response_cache(MISS)
+            # Сбросы после этого значения делают запись устаревшей
+            started = found.get(CLOCK_KEY, 0)
+            etag = quote_etag(hashlib.md5(
+                f'{path}|{versions}|{started}'.encode()
+            ).hexdigest())
+            self.cached_pks = () if pk is None else (pk,)
+            response = handler(request, *args, **kwargs)
+            response['X-Cache'] = 'MISS'
+            if response.status_code != 200:
+                return response
+
+            def store(rendered):
+                cache.set(
+                    key,
+                    (versions, started, self.cached_pks, etag,
+                     rendered.content, rendered['Content-Type']),
+                    timeout=settings.RESPONSE_CACHE_TIMEOUT,
+                )
+            response.add_post_render_callback(store)
+        response['ETag'] = etag
+        self.patch_cache_headers(request, response)
+        return response
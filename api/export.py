@@ -0,0 +1,210 @@
+import csv
+import datetime
+import io
+from itertools import islice
+
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils import encoders
+
+from .models import Comment, Review, Title
+from .renderers import FastJSONRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+
+TITLE_COLUMNS = ('id', 'name', 'year', 'rating', 'description', 'category',
+                 'genre')
+REVIEW_COLUMNS = ('kind', 'id', 'title', 'review', 'author', 'text', 'score',
+                  'pub_date')
+
+# Даты в выгрузке кодируются так же, как в ответах API
+encode_value = encoders.JSONEncoder().default
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """ Одна JSON-запись на строку
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(data) + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """ Словарь в виде заголовка и одной строки CSV, нужен для ошибок
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        return csv_chunk([list(data), [str(value) for value in
+                                       data.values()]])
+
+
+def parse_since(value):
+    """ Момент из ISO-строки с датой или датой и временем
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Неверная дата: {value}')
+        moment = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def title_rows(chunk_size=EXPORT_CHUNK_SIZE):
+    """ Произведения с жанрами, категорией и рейтингом
+
+    Строки читаются курсором на сервере, жанры догружаются
+    одним запросом на пачку.
+    """
+    titles = Title.objects.order_by('id').values(
+        'id', 'name', 'year', 'description', 'rating_sum', 'rating_count',
+        'category__name', 'category__slug',
+    ).iterator(chunk_size=chunk_size)
+    for chunk in chunked(titles, chunk_size):
+        genres = {}
+        links = Title.genre.through.objects.filter(
+            title_id__in=[row['id'] for row in chunk]
+        ).order_by('id').values_list('title_id', 'genre__name', 'genre__slug')
+        for title_id, name, slug in links:
+            genres.setdefault(title_id, []).append(
+                {'name': name, 'slug': slug}
+            )
+        for row in chunk:
+            count = row['rating_count']
+            yield {
+                'id': row['id'],
+                'name': row['name'],
+                'year': row['year'],
+                'rating': row['rating_sum'] // count if count else None,
+                'description': row['description'],
+                'genre': genres.get(row['id'], []),
+                'category': row['category__slug'] and {
+                    'name': row['category__name'],
+                    'slug': row['category__slug'],
+                },
+            }
+
+
+def review_rows(since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """ Отзывы с комментариями в порядке публикации
+
+    С since выгружаются отзывы, опубликованные или прокомментированные
+    начиная с этого момента, вместе со всеми их комментариями.
+    """
+    reviews = Review.objects.all()
+    if since is not None:
+        reviews = reviews.annotate(commented=Exists(
+            Comment.objects.filter(review_id=OuterRef('pk'),
+                                   pub_date__gte=since)
+        )).filter(Q(pub_date__gte=since) | Q(commented=True))
+    reviews = reviews.order_by('pub_date', 'id').values(
+        'id', 'title_id', 'author__username', 'text', 'score', 'pub_date',
+    ).iterator(chunk_size=chunk_size)
+    for chunk in chunked(reviews, chunk_size):
+        comments = {}
+        replies = Comment.objects.filter(
+            review_id__in=[row['id'] for row in chunk]
+        ).order_by('pub_date', 'id').values_list(
+            'review_id', 'id', 'author__username', 'text', 'pub_date'
+        )
+        for review_id, pk, author, text, pub_date in replies:
+            comments.setdefault(review_id, []).append({
+                'id': pk, 'author': author, 'text': text,
+                'pub_date': pub_date,
+            })
+        for row in chunk:
+            yield {
+                'id': row['id'],
+                'title': row['title_id'],
+                'author': row['author__username'],
+                'text': row['text'],
+                'score': row['score'],
+                'pub_date': row['pub_date'],
+                'comments': comments.get(row['id'], []),
+            }
+
+
+def title_csv_rows(title):
+    category = title['category']
+    yield [
+        title['id'], title['name'], title['year'], title['rating'],
+        title['description'], category and category['slug'],
+        ','.join(genre['slug'] for genre in title['genre']),
+    ]
+
+
+def review_csv_rows(review):
+    # Комментарии идут строками kind=comment сразу за своим отзывом
+    yield ['review', review['id'], review['title'], None, review['author'],
+           review['text'], review['score'], review['pub_date']]
+    for comment in review['comments']:
+        yield ['comment', comment['id'], review['title'], review['id'],
+               comment['author'], comment['text'], None,
+               comment['pub_date']]
+
+
+EXPORTS = {
+    'titles': (title_rows, TITLE_COLUMNS, title_csv_rows),
+    'reviews': (review_rows, REVIEW_COLUMNS, review_csv_rows),
+}
+# У произведений нет даты публикации, since поддерживают только отзывы
+INCREMENTAL_EXPORTS = ('reviews',)
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def csv_chunk(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            '' if value is None else
+            value if isinstance(value, (str, int)) else encode_value(value)
+            for value in row
+        ])
+    return buffer.getvalue().encode()
+
+
+def stream_export(name, export_format, since=None,
+                  chunk_size=EXPORT_CHUNK_SIZE):
+    """ Выгрузка в виде последовательности байтовых кусков
+
+    Каждый кусок соответствует пачке строк, поэтому память не растет
+    с размером данных.
+    """
+    rows_for, columns, csv_rows = EXPORTS[name]
+    kwargs = {'chunk_size': chunk_size}
+    if since is not None:
+        kwargs['since'] = since
+    rows = rows_for(**kwargs)
+
+    if export_format == 'csv':
+        yield csv_chunk([columns])
+        for chunk in chunked(rows, chunk_size):
+            yield csv_chunk(
+                line for row in chunk for line in csv_rows(row)
+            )
+        return
+
+    renderer = FastJSONRenderer()
+    for chunk in chunked(rows, chunk_size):
+        yield b''.join(renderer.render(row) + b'\n' for row in chunk)
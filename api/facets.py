@@ -0,0 +1,209 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import CharField, Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Cast
+
+from .caching import TITLE, bump_versions_on_commit
+from .models import Category, FacetCount, Genre, Title
+
+# Годы группируются по десятилетиям
+YEAR_BUCKET = 10
+FACET_MODELS = {Genre: FacetCount.GENRE, Category: FacetCount.CATEGORY}
+
+state = threading.local()
+
+
+def facet_query(titles):
+    """ Группировки по жанру, категории и десятилетию одним UNION
+
+    Строки: (фасет, ключ, подпись, число произведений).
+    """
+    ids = titles.order_by().values('pk')
+    db = titles.db
+    text = CharField()
+
+    def group(queryset, facet, key, label):
+        # Одинаковые имена столбцов во всех частях UNION
+        return queryset.annotate(
+            facet=Value(facet, output_field=text), key=key, label=label,
+        ).values_list('facet', 'key', 'label').annotate(
+            total=Count('pk')
+        ).order_by()
+
+    genres = group(
+        Title.genre.through.objects.using(db).filter(title_id__in=ids),
+        FacetCount.GENRE, F('genre__slug'), F('genre__name'),
+    )
+    titles = Title.objects.using(db).filter(pk__in=ids)
+    categories = group(
+        titles.filter(category__isnull=False),
+        FacetCount.CATEGORY, F('category__slug'), F('category__name'),
+    )
+    decade = Cast(F('year') - F('year') % YEAR_BUCKET, text)
+    years = group(titles.filter(year__isnull=False), FacetCount.YEAR,
+                  decade, decade)
+    return genres.union(categories, years, all=True)
+
+
+def refresh_facets(using=DEFAULT_DB_ALIAS):
+    """ Пересобирает сводную таблицу фасетов по всем произведениям
+
+    Нужна после загрузки в обход моделей, обычная запись сдвигает
+    счетчики через apply_facet_deltas.
+    """
+    with transaction.atomic(using=using):
+        rows = list(facet_query(Title.objects.using(using)))
+        FacetCount.objects.using(using).all().delete()
+        FacetCount.objects.using(using).bulk_create([
+            FacetCount(facet=facet, key=key, label=label, count=total)
+            for facet, key, label, total in rows
+        ])
+        # Ответы, закэшированные до пересчета, становятся устаревшими
+        bump_versions_on_commit(TITLE)
+    return len(rows)
+
+
+def tracking():
+    return not getattr(state, 'paused', False)
+
+
+@contextmanager
+def tracking_paused():
+    """ Сигналы произведений не сдвигают счетчики внутри блока
+
+    Массовая запись сравнивает вклад произведений до и после сама.
+    """
+    state.paused = True
+    try:
+        yield
+    finally:
+        state.paused = False
+
+
+def field_counts(rows):
+    """ Вклад пар (категория, год) в счетчики {(фасет, значение): число}
+    """
+    counts = Counter()
+    for category_id, year in rows:
+        if category_id is not None:
+            counts[(FacetCount.CATEGORY, category_id)] += 1
+        if year is not None:
+            counts[(FacetCount.YEAR, year - year % YEAR_BUCKET)] += 1
+    return counts
+
+
+def genre_counts(genre_ids):
+    return Counter((FacetCount.GENRE, pk) for pk in genre_ids)
+
+
+def title_counts(title_ids, lock=False):
+    """ Вклад произведений во все фасеты по данным из базы
+
+    С lock строки произведений блокируются до конца транзакции, чтобы
+    параллельная запись не посчитала те же изменения.
+    """
+    titles = Title.objects.filter(pk__in=title_ids)
+    if lock:
+        titles = titles.select_for_update().order_by('pk')
+    counts = field_counts(titles.values_list('category_id', 'year'))
+    counts.update(genre_counts(Title.genre.through.objects.filter(
+        title_id__in=title_ids
+    ).values_list('genre_id', flat=True)))
+    return counts
+
+
+def apply_facet_delta(facet, key, label, delta):
+    rows = FacetCount.objects.filter(facet=facet, key=key)
+    if rows.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            FacetCount.objects.create(facet=facet, key=key, label=label,
+                                      count=delta)
+    except IntegrityError:
+        rows.update(count=F('count') + delta)
+
+
+def apply_facet_deltas(before, after):
+    """ Сдвигает счетчики сводки на разницу вкладов до и после записи
+
+    Выполняется в транзакции записи и меняет только затронутые ключи.
+    """
+    deltas = Counter(after)
+    deltas.subtract(before)
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    labels = {}
+    for model, facet in FACET_MODELS.items():
+        ids = [value for name, value in deltas if name == facet]
+        if ids:
+            labels.update(
+                ((facet, pk), (slug, name))
+                for pk, slug, name in model.objects.filter(
+                    pk__in=ids
+                ).values_list('pk', 'slug', 'name')
+            )
+    # Одинаковый порядок блокировок строк у параллельных транзакций
+    for (facet, value), delta in sorted(deltas.items()):
+        if facet == FacetCount.YEAR:
+            key = label = str(value)
+        elif (facet, value) in labels:
+            key, label = labels[(facet, value)]
+        else:
+            # Строка удаленного жанра или категории уже удалена
+            continue
+        apply_facet_delta(facet, key, label, delta)
+
+
+def rename_facet(model, old_slug, slug, name):
+    FacetCount.objects.filter(
+        facet=FACET_MODELS[model], key=old_slug
+    ).update(key=slug, label=name)
+
+
+def drop_facet(model, slug):
+    FacetCount.objects.filter(facet=FACET_MODELS[model], key=slug).delete()
+
+
+def refresh_labels(model, slugs):
+    """ Подписи жанров или категорий после записи в обход сигналов
+    """
+    if model not in FACET_MODELS:
+        return
+    FacetCount.objects.filter(
+        facet=FACET_MODELS[model], key__in=slugs
+    ).update(label=Subquery(
+        model.objects.filter(slug=OuterRef('key')).values('name')[:1]
+    ))
+
+
+def format_facets(rows):
+    """ Жанры и категории по убыванию числа произведений, годы по порядку
+    """
+    facets = {facet: [] for facet, _ in FacetCount.FACETS}
+    for facet, key, label, total in sorted(
+        rows, key=lambda row: (-row[3], row[1])
+    ):
+        if facet == FacetCount.YEAR:
+            start = int(key)
+            item = {'from': start, 'to': start + YEAR_BUCKET - 1}
+        else:
+            item = {'slug': key, 'name': label}
+        item['count'] = total
+        facets[facet].append(item)
+    facets[FacetCount.YEAR].sort(key=lambda item: item['from'])
+    return facets
+
+
+def title_facets(titles=None):
+    """ Фасеты отфильтрованных произведений или всего каталога из сводки
+    """
+    if titles is None:
+        rows = FacetCount.objects.filter(count__gt=0).values_list(
+            'facet', 'key', 'label', 'count'
+        )
+    else:
+        rows = facet_query(titles)
+    return format_facets(rows)
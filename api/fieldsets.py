@@ -0,0 +1,60 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+class SparseFieldsMixin:
+    """ Параметр ?fields=id,name сокращает ответ и запрос к базе
+
+    Для каждого поля ответа задаются столбцы для only(), связи через __
+    подключаются select_related, а поля из sparse_prefetch загружаются
+    prefetch_related только если их запросили.
+    """
+    sparse_fields = {}
+    sparse_prefetch = {}
+    # Столбцы, нужные при любом наборе полей, например для пагинации
+    sparse_required = ()
+
+    @cached_property
+    def requested_fields(self):
+        if self.request.method not in SAFE_METHODS:
+            return None
+        raw = self.request.query_params.get('fields', '')
+        fields = [name.strip() for name in raw.split(',') if name.strip()]
+        unknown = set(fields) - set(self.sparse_fields) - set(
+            self.sparse_prefetch
+        )
+        if unknown:
+            raise ValidationError({
+                'fields': f'Неизвестные поля: {", ".join(sorted(unknown))}'
+            })
+        return frozenset(fields) or None
+
+    def sparse_queryset(self, queryset):
+        requested = self.requested_fields
+        columns = {queryset.model._meta.pk.name, *self.sparse_required}
+        related = set()
+        prefetch = []
+        for name, lookups in self.sparse_fields.items():
+            if requested and name not in requested:
+                continue
+            columns.update(lookups)
+            related.update(lookup.rpartition('__')[0] for lookup in lookups
+                           if '__' in lookup)
+        for name, lookup in self.sparse_prefetch.items():
+            if not requested or name in requested:
+                prefetch.append(lookup)
+
+        if related:
+            queryset = queryset.select_related(*sorted(related))
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if requested:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.requested_fields:
+            context['fields'] = self.requested_fields
+        return context
@@ -1,19 +1,41 @@
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import connections
+from django.db.models import F, Q
 from django_filters import rest_framework as filters
 
 from .models import Title
 
+SEARCH_CONFIG = 'russian'
+
 
 class TitlesFilter(filters.FilterSet):
     name = filters.CharFilter(
         field_name='name', lookup_expr='contains'
     )
     category = filters.CharFilter(
-        field_name='category__slug', lookup_expr='contains'
+        field_name='category__slug', lookup_expr='exact'
     )
     genre = filters.CharFilter(
-        field_name='genre__slug', lookup_expr='contains'
+        field_name='genre__slug', lookup_expr='exact'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta():
         model = Title
         fields = ['name', 'genre', 'category', 'year']
+
+    def filter_search(self, queryset, name, value):
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        # Полнотекстовый поиск по GIN-индексу и нечеткое совпадение
+        # названия через триграммный индекс
+        query = SearchQuery(value, config=SEARCH_CONFIG)
+        return queryset.filter(
+            Q(search_vector=query) | Q(name__trigram_similar=value)
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), query),
+            similarity=TrigramSimilarity('name', value),
+        ).order_by('-search_rank', '-similarity', 'id')
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.export import (EXPORT_CHUNK_SIZE, EXPORT_FORMATS, EXPORTS,
+                        INCREMENTAL_EXPORTS, parse_since, stream_export)
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает произведения или отзывы в NDJSON или CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', dest='export_format',
+                            choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument(
+            '--since',
+            help='Только отзывы, опубликованные или прокомментированные '
+                 'с этого момента (ISO 8601)'
+        )
+        parser.add_argument('--chunk-size', type=int,
+                            default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', help='Файл, по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since:
+            if options['name'] not in INCREMENTAL_EXPORTS:
+                raise CommandError('--since поддерживается только для '
+                                   'отзывов')
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise CommandError(error)
+
+        chunks = stream_export(options['name'], options['export_format'],
+                               since or None, options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
@@ -0,0 +1,222 @@
+import csv
+import os
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from api import caching
+from api.facets import refresh_facets
+from api.management.loading import keep_pub_date
+from api.models import Category, Comment, Genre, Review, Title, User
+from api.rankings import refresh_rankings
+from api.ratings import recalculate_ratings
+
+
+def to_int(value):
+    return int(value) if value not in (None, '') else None
+
+
+class Command(BaseCommand):
+    help = 'Потоково загружает CSV-файлы из каталога data/ в базу'
+
+    # Порядок важен: таблица загружается после тех, на которые ссылается
+    tables = (
+        ('users', 'users.csv'),
+        ('category', 'category.csv'),
+        ('genre', 'genre.csv'),
+        ('titles', 'titles.csv'),
+        ('genre_title', 'genre_title.csv'),
+        ('review', 'review.csv'),
+        ('comments', 'comments.csv'),
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=os.path.join(settings.BASE_DIR, 'data'),
+            help='Каталог с CSV-файлами'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество строк в одной транзакции'
+        )
+        parser.add_argument(
+            'only', nargs='*', metavar='table',
+            help='Загрузить только указанные таблицы'
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        only = set(options['only'])
+        unknown = only - {name for name, _ in self.tables}
+        if unknown:
+            raise CommandError(f'Неизвестные таблицы: {", ".join(unknown)}')
+
+        self.ids = {}
+        for name, filename in self.tables:
+            if only and name not in only:
+                continue
+            path = os.path.join(options['path'], filename)
+            if not os.path.exists(path):
+                self.stdout.write(f'{filename}: файл не найден, пропущен')
+                continue
+            getattr(self, f'load_{name}')(path)
+
+        self.reset_sequences()
+        caching.bump_versions(caching.CATEGORY, caching.GENRE,
+                              caching.TITLE, caching.RANKING)
+        if not only or only & {'titles', 'review'}:
+            recalculate_ratings()
+            refresh_rankings()
+        if not only or only & {'category', 'genre', 'titles', 'genre_title'}:
+            refresh_facets()
+
+    def known_ids(self, model):
+        # Множество ключей вместо запроса на каждую строку
+        if model not in self.ids:
+            self.ids[model] = set(
+                model.objects.values_list('id', flat=True).iterator()
+            )
+        return self.ids[model]
+
+    def load(self, path, model, build, ignore_conflicts=False):
+        started = time.monotonic()
+        loaded = skipped = 0
+        known = self.known_ids(model)
+        before = model.objects.count() if ignore_conflicts else 0
+        with open(path, encoding='utf-8', newline='') as csv_file:
+            rows = csv.DictReader(csv_file)
+            while True:
+                chunk = list(islice(rows, self.batch_size))
+                if not chunk:
+                    break
+                objects = [obj for obj in map(build, chunk) if obj]
+                with transaction.atomic():
+                    model.objects.bulk_create(
+                        objects, ignore_conflicts=ignore_conflicts
+                    )
+                known.update(obj.id for obj in objects)
+                loaded += len(objects)
+                skipped += len(chunk) - len(objects)
+
+        if ignore_conflicts:
+            # Часть строк могла не вставиться: ключи перечитываются из базы
+            del self.ids[model]
+            inserted = model.objects.count() - before
+            skipped += loaded - inserted
+            loaded = inserted
+
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else loaded
+        self.stdout.write(
+            f'{os.path.basename(path)}: {loaded} строк, '
+            f'пропущено {skipped}, {rate:.0f} строк/с'
+        )
+
+    def load_users(self, path):
+        def build(row):
+            return User(
+                id=to_int(row['id']),
+                username=row['username'],
+                email=row['email'],
+                role=row['role'] or User.USER,
+                bio=row.get('description') or '',
+                first_name=row.get('first_name') or '',
+                last_name=row.get('last_name') or '',
+                password=make_password(None),
+            )
+        self.load(path, User, build)
+
+    def load_category(self, path):
+        self.load(path, Category, lambda row: Category(
+            id=to_int(row['id']), name=row['name'], slug=row['slug']
+        ))
+
+    def load_genre(self, path):
+        self.load(path, Genre, lambda row: Genre(
+            id=to_int(row['id']), name=row['name'], slug=row['slug']
+        ))
+
+    def load_titles(self, path):
+        categories = self.known_ids(Category)
+
+        def build(row):
+            category_id = to_int(row['category'])
+            return Title(
+                id=to_int(row['id']),
+                name=row['name'],
+                year=to_int(row['year']),
+                description=row.get('description', ''),
+                category_id=category_id if category_id in categories else None,
+            )
+        self.load(path, Title, build)
+
+    def load_genre_title(self, path):
+        titles = self.known_ids(Title)
+        genres = self.known_ids(Genre)
+        through = Title.genre.through
+
+        def build(row):
+            title_id = to_int(row['title_id'])
+            genre_id = to_int(row['genre_id'])
+            if title_id not in titles or genre_id not in genres:
+                return None
+            return through(id=to_int(row['id']), title_id=title_id,
+                           genre_id=genre_id)
+        self.load(path, through, build)
+
+    def load_review(self, path):
+        titles = self.known_ids(Title)
+        users = self.known_ids(User)
+
+        def build(row):
+            title_id = to_int(row['title_id'])
+            author_id = to_int(row['author'])
+            if title_id not in titles or author_id not in users:
+                return None
+            return Review(
+                id=to_int(row['id']),
+                title_id=title_id,
+                author_id=author_id,
+                text=row['text'],
+                score=to_int(row['score']),
+                pub_date=parse_datetime(row['pub_date']),
+            )
+        # Повторные отзывы автора на произведение отсекает ограничение
+        # уникальности, такие строки пропускаются
+        with keep_pub_date(Review):
+            self.load(path, Review, build, ignore_conflicts=True)
+
+    def load_comments(self, path):
+        reviews = self.known_ids(Review)
+        users = self.known_ids(User)
+
+        def build(row):
+            review_id = to_int(row['review_id'])
+            author_id = to_int(row['author'])
+            if review_id not in reviews or author_id not in users:
+                return None
+            return Comment(
+                id=to_int(row['id']),
+                review_id=review_id,
+                author_id=author_id,
+                text=row['text'],
+                pub_date=parse_datetime(row['pub_date']),
+            )
+        with keep_pub_date(Comment):
+            self.load(path, Comment, build)
+
+    def reset_sequences(self):
+        # Ключи взяты из файлов, поэтому последовательности нужно сдвинуть
+        models = [User, Category, Genre, Title, Title.genre.through,
+                  Review, Comment]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from api.facets import refresh_facets
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает сводку фасетов каталога произведений'
+
+    def handle(self, *args, **options):
+        rows = refresh_facets()
+        self.stdout.write(
+            self.style.SUCCESS(f'Строк в сводке фасетов: {rows}')
+        )
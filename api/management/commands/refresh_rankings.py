@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.rankings import refresh_rankings
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает списки лучших и обсуждаемых произведений, '
+            'запускается по расписанию')
+
+    def handle(self, *args, **options):
+        rows = refresh_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Произведений в рейтингах: {rows}')
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.caching import HIT, MISS, response_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэша ответов'
+
+    def handle(self, *args, **options):
+        stats = response_cache_stats()
+        total = stats[HIT] + stats[MISS]
+        ratio = stats[HIT] / total if total else 0
+        self.stdout.write(
+            f'hit={stats[HIT]} miss={stats[MISS]} hit_ratio={ratio:.2%}'
+        )
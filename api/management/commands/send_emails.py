@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import OutgoingEmail
+from api.outbox import send_pending
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-attempts', type=int, default=5)
+        parser.add_argument(
+            '--backoff', type=int, default=60,
+            help='Задержка первой повторной попытки в секундах'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, опрашивая очередь'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Пауза между опросами пустой очереди в секундах'
+        )
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'retried': 0, 'failed': 0}
+        while True:
+            stats = send_pending(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+                backoff=options['backoff'],
+            )
+            for key in totals:
+                totals[key] += stats[key]
+            processed = stats['sent'] + stats['retried'] + stats['failed']
+            if processed:
+                self.stdout.write(
+                    f'sent={stats["sent"]} retried={stats["retried"]} '
+                    f'failed={stats["failed"]} '
+                    f'seconds={stats["seconds"]:.3f}'
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        pending = OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING
+        ).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Итого: sent={totals["sent"]} retried={totals["retried"]} '
+            f'failed={totals["failed"]} pending={pending}'
+        ))
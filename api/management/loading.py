@@ -0,0 +1,16 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def keep_pub_date(model):
+    """ Отключает auto_now_add, чтобы bulk_create сохранил заданные даты
+
+    Меняет общее для всех потоков поле модели, поэтому годится только
+    для команд загрузки, а не для кода запросов.
+    """
+    field = model._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
@@ -0,0 +1,54 @@
+# Generated by Django 3.0.8 on 2026-10-18 06:12
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+CREATE_SEARCH_SQL = (
+    "CREATE INDEX api_title_search_vector_idx ON api_title "
+    "USING gin (search_vector)",
+    "CREATE INDEX api_title_name_trgm_idx ON api_title "
+    "USING gin (name gin_trgm_ops)",
+    "CREATE TRIGGER api_title_search_vector_update "
+    "BEFORE INSERT OR UPDATE OF name, description ON api_title "
+    "FOR EACH ROW EXECUTE PROCEDURE tsvector_update_trigger("
+    "search_vector, 'pg_catalog.russian', name, description)",
+    "UPDATE api_title SET search_vector = to_tsvector("
+    "'pg_catalog.russian', coalesce(name, '') || ' ' || "
+    "coalesce(description, ''))",
+)
+
+DROP_SEARCH_SQL = (
+    "DROP TRIGGER IF EXISTS api_title_search_vector_update ON api_title",
+    "DROP INDEX IF EXISTS api_title_name_trgm_idx",
+    "DROP INDEX IF EXISTS api_title_search_vector_idx",
+)
+
+
+def execute_on_postgresql(statements):
+    def execute(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return execute
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_outgoingemail'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='title',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            execute_on_postgresql(CREATE_SEARCH_SQL),
+            execute_on_postgresql(DROP_SEARCH_SQL),
+        ),
+    ]
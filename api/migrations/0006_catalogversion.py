@@ -0,0 +1,33 @@
+# Generated by Django 3.0.8 on 2026-10-18 06:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def create_versions(apps, schema_editor):
+    # Момент миграции считается последним изменением уже загруженных данных
+    CatalogVersion = apps.get_model('api', 'CatalogVersion')
+    db = schema_editor.connection.alias
+    CatalogVersion.objects.using(db).bulk_create([
+        CatalogVersion(name=name)
+        for name in ('category', 'genre', 'title', 'review')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_title_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
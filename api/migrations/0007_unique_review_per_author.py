@@ -0,0 +1,55 @@
+# Generated by Django 3.0.8 on 2026-10-18 06:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    # Оставляем самый ранний отзыв автора на произведение
+    Review = apps.get_model('api', 'Review')
+    Title = apps.get_model('api', 'Title')
+    db = schema_editor.connection.alias
+    duplicates = Review.objects.using(db).values(
+        'title', 'author'
+    ).order_by().annotate(
+        first_id=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    removed = False
+    for row in duplicates.iterator():
+        Review.objects.using(db).filter(
+            title=row['title'], author=row['author'], id__gt=row['first_id']
+        ).delete()
+        removed = True
+    if not removed:
+        return
+
+    reviews = Review.objects.using(db).filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    Title.objects.using(db).update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_catalogversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reviews,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('title', 'author'), name='unique_review_per_author'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.0.8 on 2026-10-18 06:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_facets(apps, schema_editor):
+    # Сводка по уже загруженным произведениям
+    Title = apps.get_model('api', 'Title')
+    FacetCount = apps.get_model('api', 'FacetCount')
+    db = schema_editor.connection.alias
+    titles = Title.objects.using(db).order_by()
+    rows = [
+        FacetCount(facet='genre', key=slug, label=name, count=total)
+        for slug, name, total in Title.genre.through.objects.using(
+            db
+        ).order_by().values_list('genre__slug', 'genre__name').annotate(
+            total=Count('id')
+        )
+    ]
+    rows += [
+        FacetCount(facet='category', key=slug, label=name, count=total)
+        for slug, name, total in titles.filter(
+            category__isnull=False
+        ).values_list('category__slug', 'category__name').annotate(
+            total=Count('id')
+        )
+    ]
+    decades = {}
+    for year, total in titles.filter(year__isnull=False).values_list(
+        'year'
+    ).annotate(total=Count('id')):
+        decade = str(year - year % 10)
+        decades[decade] = decades.get(decade, 0) + total
+    rows += [
+        FacetCount(facet='year', key=decade, label=decade, count=total)
+        for decade, total in decades.items()
+    ]
+    FacetCount.objects.using(db).bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_unique_review_per_author'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('genre', 'genre'), ('category', 'category'), ('year', 'year')], max_length=20)),
+                ('key', models.CharField(max_length=50)),
+                ('label', models.CharField(max_length=200)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='facetcount',
+            constraint=models.UniqueConstraint(fields=('facet', 'key'), name='unique_facet_key'),
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.0.8 on 2026-10-18 06:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_facetcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='api.Title')),
+                ('score', models.FloatField(db_index=True, null=True)),
+                ('recent_reviews', models.PositiveIntegerField(db_index=True, default=0)),
+                ('updated', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 3.0.8 on 2026-10-18 06:49
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def fill_scores(apps, schema_editor):
+    # Гистограммы по уже загруженным отзывам одним GROUP BY
+    Review = apps.get_model('api', 'Review')
+    TitleScores = apps.get_model('api', 'TitleScores')
+    db = schema_editor.connection.alias
+    rows = Review.objects.using(db).order_by().values('title_id').annotate(**{
+        f'score_{score}': Count('id', filter=Q(score=score))
+        for score in range(1, 11)
+    })
+    TitleScores.objects.using(db).bulk_create(
+        (TitleScores(**row) for row in rows.iterator()), batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_titleranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleScores',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scores', serialize=False, to='api.Title')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
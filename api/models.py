@@ -1,7 +1,9 @@
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class User(AbstractUser):
@@ -27,6 +29,11 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Сводка фасетов меняется в той же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Genre(models.Model):
     name = models.CharField(max_length=200)
@@ -35,6 +42,11 @@ class Genre(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Сводка фасетов меняется в той же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Title(models.Model):
     name = models.CharField(max_length=200)
@@ -49,15 +61,54 @@ class Title(models.Model):
         null=True,
         db_column='category'
     )
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    # Заполняется триггером PostgreSQL из name и description
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # Сводка фасетов меняется в той же транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     @property
     def rating(self):
-        reviews = self.reviews.all()
-        score_avg = reviews.aggregate(models.Avg('score')).get('score__avg')
-        return None if isinstance(score_avg, type(None)) else int(score_avg)
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
+
+class TitleScores(models.Model):
+    """ Число отзывов с каждой оценкой от 1 до 10 для произведения
+    """
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='scores'
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.title_id}, {self.counts}'
+
+    @property
+    def counts(self):
+        return [getattr(self, f'score_{score}') for score in self.SCORES]
 
 
 class Review(models.Model):
@@ -82,10 +133,31 @@ class Review(models.Model):
 
     class Meta:
         ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(fields=('title', 'author'),
+                                    name='unique_review_per_author'),
+        ]
 
     def __str__(self):
         return f'{self.title}, {self.score}, {self.author}'
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_rating_state()
+        return instance
+
+    def remember_rating_state(self):
+        """ Запоминает оценку, уже учтенную в рейтинге произведения
+        """
+        self._rated_title_id = self.__dict__.get('title_id')
+        self._rated_score = self.__dict__.get('score')
+
+    def save(self, *args, **kwargs):
+        # Отзыв и рейтинг произведения обновляются в одной транзакции
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -108,3 +180,86 @@ class Comment(models.Model):
 
     def __str__(self):
         return f'{self.author}, {self.pub_date:%d.%m.%Y}, {self.text[:50]}'
+
+
+class OutgoingEmail(models.Model):
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'pending'),
+        (SENT, 'sent'),
+        (FAILED, 'failed'),
+    )
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipient = models.EmailField()
+    status = models.CharField(max_length=10, choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f'{self.recipient}, {self.subject}, {self.status}'
+
+
+class CatalogVersion(models.Model):
+    """ Счетчик изменений таблицы для ETag и ключей кэша
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.name}, {self.version}'
+
+
+class FacetCount(models.Model):
+    """ Сводка числа произведений по жанру, категории и десятилетию
+    """
+    GENRE = 'genre'
+    CATEGORY = 'category'
+    YEAR = 'year'
+    FACETS = (
+        (GENRE, 'genre'),
+        (CATEGORY, 'category'),
+        (YEAR, 'year'),
+    )
+    facet = models.CharField(max_length=20, choices=FACETS)
+    key = models.CharField(max_length=50)
+    label = models.CharField(max_length=200)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=('facet', 'key'),
+                                    name='unique_facet_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.facet}, {self.key}, {self.count}'
+
+
+class TitleRanking(models.Model):
+    """ Место произведения в списках лучших и обсуждаемых
+    """
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking'
+    )
+    # Байесовская средняя, пока отзывов меньше порога - None
+    score = models.FloatField(null=True, db_index=True)
+    recent_reviews = models.PositiveIntegerField(default=0, db_index=True)
+    updated = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.title_id}, {self.score}, {self.recent_reviews}'
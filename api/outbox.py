@@ -0,0 +1,93 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(subject, message, from_email, recipient):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient=recipient,
+    )
+
+
+def retry_delay(attempts, backoff):
+    return timedelta(seconds=backoff * 2 ** (attempts - 1))
+
+
+def send_pending(batch_size=100, max_attempts=5, backoff=60):
+    """ Отправляет пачку писем из очереди через одно соединение
+
+    Строки блокируются до конца отправки, параллельные обработчики
+    пропускают их благодаря skip_locked.
+    """
+    started = time.monotonic()
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+            ).order_by('next_attempt_at')[:batch_size]
+        )
+        if not batch:
+            stats['seconds'] = time.monotonic() - started
+            return stats
+
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+            errors = {}
+            for email in batch:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.message,
+                    from_email=email.from_email,
+                    to=(email.recipient,),
+                    connection=connection,
+                )
+                try:
+                    connection.send_messages([message])
+                except Exception as error:
+                    errors[email.pk] = error
+        except Exception as error:
+            # Соединение не открылось: повторяем всю пачку позже
+            errors = {email.pk: error for email in batch}
+        finally:
+            connection.close()
+
+        for email in batch:
+            email.attempts += 1
+            error = errors.get(email.pk)
+            if error is None:
+                email.status = OutgoingEmail.SENT
+                email.sent_at = now
+                email.last_error = ''
+                stats['sent'] += 1
+            elif email.attempts >= max_attempts:
+                email.status = OutgoingEmail.FAILED
+                email.last_error = str(error)
+                stats['failed'] += 1
+            else:
+                email.next_attempt_at = now + retry_delay(email.attempts,
+                                                          backoff)
+                email.last_error = str(error)
+                stats['retried'] += 1
+        OutgoingEmail.objects.bulk_update(
+            batch,
+            ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at']
+        )
+
+    stats['seconds'] = time.monotonic() - started
+    logger.info('outbox batch sent=%(sent)d retried=%(retried)d '
+                'failed=%(failed)d seconds=%(seconds).3f', stats)
+    return stats
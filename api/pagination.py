@@ -1,7 +1,50 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 
 class UserInfoPagination(PageNumberPagination):
     def get_paginated_response(self, data):
         return Response(data)
+
+
+class PubDateCursorPagination(CursorPagination):
+    """ Курсор по индексу pub_date, id разрешает совпадения дат
+    """
+    ordering = ('-pub_date', '-id')
+
+
+class FeedPagination(PageNumberPagination):
+    """ Постраничная выдача, по запросу переключаемая на курсорную
+
+    Курсорный режим включается параметром ?pagination=cursor либо
+    наличием ?cursor=. Он не выполняет COUNT(*) и не использует OFFSET
+    для глубоких страниц.
+    """
+    mode_query_param = 'pagination'
+    cursor_class = PubDateCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return (params.get(self.mode_query_param) == 'cursor' or
+                self.cursor_class.cursor_query_param in params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
@@ -39,6 +39,16 @@ class IsAdminOrReadOnly(permissions.BasePermission):
             return bool(user.is_staff or user.role == user.ADMIN)
 
 
+class IsAdminRole(permissions.BasePermission):
+    """ Проверка на администратора для любых методов
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user.is_authenticated and
+                    (user.is_staff or user.role == user.ADMIN))
+
+
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
         return (request.user.is_authenticated and
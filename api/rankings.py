@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .caching import RANKING, bump_versions_on_commit
+from .models import Review, Title, TitleRanking
+
+MEAN_SCORE_KEY = 'rankings:mean-score'
+RANKING_MAX_LIMIT = 100
+
+
+def mean_score(refresh=False):
+    """ Средняя оценка по всем отзывам каталога
+
+    Запоминается при полном пересчете, частичные пересчеты берут
+    ее из кэша.
+    """
+    mean = None if refresh else cache.get(MEAN_SCORE_KEY)
+    if mean is None:
+        totals = Title.objects.aggregate(total=Sum('rating_sum'),
+                                         count=Sum('rating_count'))
+        mean = totals['total'] / totals['count'] if totals['count'] else 0
+        cache.set(MEAN_SCORE_KEY, mean, timeout=None)
+    return mean
+
+
+def bayesian_score(rating_sum, rating_count, mean):
+    # Оценка тянется к средней по каталогу, пока отзывов немного
+    weight = settings.RANKING_MIN_REVIEWS
+    if not rating_count or rating_count < weight:
+        return None
+    return (weight * mean + rating_sum) / (weight + rating_count)
+
+
+def refresh_rankings(title_ids=None):
+    """ Пересчитывает таблицу рейтингов целиком или для части произведений
+
+    Оценки берутся из сумм на произведениях, отзывы за окно
+    TRENDING_WINDOW_DAYS считаются по индексу pub_date. Строки
+    обновляются на месте, поэтому параллельные пересчеты не мешают
+    друг другу.
+    """
+    now = timezone.now()
+    titles = Title.objects.order_by()
+    recent = Review.objects.filter(
+        pub_date__gte=now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    )
+    rankings = TitleRanking.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+        recent = recent.filter(title_id__in=title_ids)
+        rankings = rankings.filter(title_id__in=title_ids)
+
+    with transaction.atomic():
+        mean = mean_score(refresh=title_ids is None)
+        recent = dict(recent.order_by().values_list('title_id').annotate(
+            total=Count('id')
+        ))
+        rows = {}
+        for pk, rating_sum, rating_count in titles.values_list(
+            'pk', 'rating_sum', 'rating_count'
+        ).iterator():
+            score = bayesian_score(rating_sum, rating_count, mean)
+            if score is not None or pk in recent:
+                rows[pk] = TitleRanking(title_id=pk, score=score,
+                                        recent_reviews=recent.get(pk, 0),
+                                        updated=now)
+        existing = set(rankings.select_for_update().order_by(
+            'title_id'
+        ).values_list('title_id', flat=True))
+        TitleRanking.objects.filter(
+            title_id__in=existing - rows.keys()
+        ).delete()
+        TitleRanking.objects.bulk_update(
+            [rows[pk] for pk in existing & rows.keys()],
+            ('score', 'recent_reviews', 'updated'), batch_size=1000
+        )
+        create_rankings([rows[pk] for pk in rows.keys() - existing])
+        bump_versions_on_commit(RANKING)
+    return len(rows)
+
+
+def create_rankings(rows):
+    """ Добавляет новые строки рейтинга
+
+    Если строку уже вставил параллельный пересчет, она обновляется.
+    """
+    try:
+        with transaction.atomic():
+            TitleRanking.objects.bulk_create(rows, batch_size=1000)
+    except IntegrityError:
+        for row in rows:
+            TitleRanking.objects.update_or_create(
+                title_id=row.title_id,
+                defaults={'score': row.score,
+                          'recent_reviews': row.recent_reviews,
+                          'updated': row.updated},
+            )
+
+
+def ranked(titles):
+    return titles.annotate(
+        score=F('ranking__score'),
+        recent_reviews=F('ranking__recent_reviews'),
+    ).select_related('category').prefetch_related('genre')
+
+
+def top_rated(titles):
+    """ Произведения с достаточным числом отзывов по байесовской оценке
+    """
+    return ranked(titles).filter(
+        ranking__score__isnull=False
+    ).order_by('-ranking__score', 'id')
+
+
+def trending(titles):
+    """ Произведения по числу свежих отзывов
+    """
+    return ranked(titles).filter(
+        ranking__recent_reviews__gt=0
+    ).order_by(
+        '-ranking__recent_reviews',
+        F('ranking__score').desc(nulls_last=True),
+        'id',
+    )
@@ -0,0 +1,155 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .caching import (TITLE, bump_versions_on_commit,
+                      invalidate_objects_on_commit)
+from .models import Review, Title, TitleScores
+
+
+def apply_review_delta(title_id, score_delta, count_delta):
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        rating_count=F('rating_count') + count_delta,
+    )
+
+
+def apply_score_delta(title_id, score, delta):
+    """ Сдвигает счетчик одной оценки в гистограмме произведения
+
+    Оценка берется из заблокированной строки отзыва (lock_rated_state),
+    иначе параллельные правки уводят счетчики ниже нуля.
+    """
+    if score not in TitleScores.SCORES:
+        return
+    column = f'score_{score}'
+    scores = TitleScores.objects.filter(title_id=title_id)
+    if scores.update(**{column: F(column) + delta}) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            TitleScores.objects.create(title_id=title_id, **{column: delta})
+    except IntegrityError:
+        scores.update(**{column: F(column) + delta})
+
+
+def lock_rated_state(review):
+    """ Блокирует строку отзыва и берет учтенную оценку из базы
+
+    Экземпляр мог быть загружен до параллельной записи, поэтому разница
+    считается от зафиксированной оценки. Если строки уже нет, учтенной
+    оценки у отзыва тоже нет.
+    """
+    row = Review.objects.select_for_update().filter(
+        pk=review.pk
+    ).values_list('title_id', 'score').first()
+    review._rated_title_id, review._rated_score = row or (None, None)
+
+
+def review_saved(review, created):
+    rated_title_id = getattr(review, '_rated_title_id', None)
+    rated_score = getattr(review, '_rated_score', None)
+    if created:
+        apply_review_delta(review.title_id, review.score, 1)
+        apply_score_delta(review.title_id, review.score, 1)
+    elif rated_score is None or rated_title_id is None:
+        # Прежняя оценка не загружалась из базы: пересчитываем целиком
+        recalculate_ratings(Title.objects.filter(pk=review.title_id))
+    elif rated_title_id != review.title_id:
+        apply_review_delta(rated_title_id, -rated_score, -1)
+        apply_review_delta(review.title_id, review.score, 1)
+        apply_score_delta(rated_title_id, rated_score, -1)
+        apply_score_delta(review.title_id, review.score, 1)
+    elif rated_score != review.score:
+        apply_review_delta(review.title_id, review.score - rated_score, 0)
+        apply_score_delta(review.title_id, rated_score, -1)
+        apply_score_delta(review.title_id, review.score, 1)
+    review.remember_rating_state()
+
+
+def review_deleted(review):
+    """ Вычитает удаленный отзыв, если строку удалил этот запрос
+    """
+    title_id = getattr(review, '_rated_title_id', None)
+    score = getattr(review, '_rated_score', None)
+    if score is None:
+        return False
+    apply_review_delta(title_id, -score, -1)
+    apply_score_delta(title_id, score, -1)
+    return True
+
+
+def recalculate_ratings(queryset=None):
+    """ Пересчитывает сумму и количество оценок одним UPDATE
+    """
+    if queryset is None:
+        queryset = Title.objects.all()
+    recalculate_scores(queryset)
+    reviews = Review.objects.filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    updated = queryset.update(
+        rating_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        rating_count=Coalesce(
+            Subquery(reviews.annotate(total=Count('id')).values('total')),
+            0
+        ),
+    )
+    # Карточки произведений кэшируются без учета версии таблицы
+    invalidate_objects_on_commit(
+        'titles', *queryset.values_list('pk', flat=True).iterator()
+    )
+    bump_versions_on_commit(TITLE)
+    return updated
+
+
+def recalculate_scores(queryset=None):
+    """ Пересобирает гистограммы оценок одним проходом по отзывам
+
+    Счетчики всех оценок считаются условной агрегацией в одном
+    GROUP BY, без запроса на каждое произведение.
+    """
+    reviews = Review.objects.order_by().values('title_id')
+    histograms = TitleScores.objects.all()
+    if queryset is not None:
+        reviews = reviews.filter(title__in=queryset.values('pk'))
+        histograms = histograms.filter(title__in=queryset.values('pk'))
+    reviews = reviews.annotate(**{
+        f'score_{score}': Count('id', filter=Q(score=score))
+        for score in TitleScores.SCORES
+    })
+    with transaction.atomic():
+        histograms.delete()
+        TitleScores.objects.bulk_create(
+            (TitleScores(**row) for row in reviews.iterator()),
+            batch_size=1000,
+        )
+
+
+def score_stats(counts):
+    """ Число отзывов, средняя, медиана и гистограмма по счетчикам оценок
+    """
+    total = sum(counts)
+    histogram = dict(zip(map(str, TitleScores.SCORES), counts))
+    if not total:
+        return {'count': 0, 'mean': None, 'median': None,
+                'histogram': histogram}
+
+    def nth(position):
+        seen = 0
+        for score, count in zip(TitleScores.SCORES, counts):
+            seen += count
+            if seen > position:
+                return score
+
+    mean = sum(score * count
+               for score, count in zip(TitleScores.SCORES, counts)) / total
+    return {
+        'count': total,
+        'mean': round(mean, 2),
+        'median': (nth((total - 1) // 2) + nth(total // 2)) / 2,
+        'histogram': histogram,
+    }
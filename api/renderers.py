@@ -0,0 +1,47 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+# Общий первый байт обоих разделителей в UTF-8
+SEPARATOR_LEAD = LINE_SEPARATOR[:1]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """ JSONRenderer на orjson с тем же форматом вывода
+
+    Без orjson, с отступами или с нестрогими настройками DRF
+    используется стандартная реализация.
+    """
+    default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or self.ensure_ascii or not self.compact or
+                not self.strict or self.get_indent(accepted_media_type,
+                                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        try:
+            # Даты отдаются кодировщику DRF: он пишет UTC как 'Z'
+            ret = orjson.dumps(
+                data,
+                default=self.default,
+                option=(orjson.OPT_NON_STR_KEYS |
+                        orjson.OPT_PASSTHROUGH_DATETIME),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        if SEPARATOR_LEAD in ret and (LINE_SEPARATOR in ret or
+                                      PARAGRAPH_SEPARATOR in ret):
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028').replace(
+                PARAGRAPH_SEPARATOR, b'\\u2029'
+            )
+        return ret
@@ -1,10 +1,44 @@
+from operator import attrgetter
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import cached_property
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from api_yamdb.middleware import timed_serialization
+
 from .models import Category, Comment, Genre, Review, Title, User
 
 
+class TimedDataMixin:
+    """ Время построения data попадает в метрики запроса
+    """
+
+    @property
+    def data(self):
+        with timed_serialization():
+            return super().data
+
+
+class TimedListSerializer(TimedDataMixin, serializers.ListSerializer):
+    pass
+
+
+class SparseFieldsSerializerMixin:
+    """ Оставляет только поля, перечисленные в контексте под ключом fields
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if not requested:
+            return fields
+        return {name: field for name, field in fields.items()
+                if name in requested}
+
+
 class PushEmailSerializer(serializers.ModelSerializer):
     email = serializers.CharField(max_length=None, min_length=None,
                                   allow_blank=False)
@@ -70,7 +104,8 @@ class UsesrsSerializer(serializers.ModelSerializer):
         )
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(TimedDataMixin, SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -79,16 +114,15 @@ class CommentSerializer(serializers.ModelSerializer):
     review = serializers.PrimaryKeyRelatedField(
         read_only=True,
     )
-    title = serializers.PrimaryKeyRelatedField(
-        read_only=True
-    )
 
     class Meta:
         model = Comment
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedDataMixin, SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True,
@@ -107,11 +141,13 @@ class ReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = Review
         fields = '__all__'
+        list_serializer_class = TimedListSerializer
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
+        list_serializer_class = TimedListSerializer
         fields = (
             'name', 'slug'
         )
@@ -120,6 +156,7 @@ class CategorySerializer(serializers.ModelSerializer):
 class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         model = Genre
+        list_serializer_class = TimedListSerializer
         fields = (
             'name', 'slug'
         )
@@ -128,18 +165,17 @@ class GenreSerializer(serializers.ModelSerializer):
 class CategoryField(serializers.SlugRelatedField):
 
     def to_representation(self, value):
-        serializer = CategorySerializer(value)
-        return serializer.data
+        return {'name': value.name, 'slug': value.slug}
 
 
 class GenreField(serializers.SlugRelatedField):
 
     def to_representation(self, value):
-        serializer = GenreSerializer(value)
-        return serializer.data
+        return {'name': value.name, 'slug': value.slug}
 
 
-class TitleSerializer(serializers.ModelSerializer):
+class TitleSerializer(TimedDataMixin, SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
     category = CategoryField(
         slug_field='slug',
         queryset=Category.objects.all(),
@@ -153,3 +189,139 @@ class TitleSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
         )
+        list_serializer_class = TimedListSerializer
+
+
+class SlugNamedBulkSerializer(serializers.Serializer):
+    """ Категория или жанр в массовой записи без запросов к базе
+    """
+    name = serializers.CharField(max_length=200)
+    slug = serializers.SlugField(max_length=50)
+
+
+class TitleBulkSerializer(serializers.Serializer):
+    """ Произведение в массовой записи со slug жанров и категории
+    """
+    name = serializers.CharField(max_length=200)
+    year = serializers.IntegerField(required=False, allow_null=True)
+    description = serializers.CharField(max_length=500, required=False,
+                                        allow_blank=True)
+    category = serializers.SlugField(required=False, allow_null=True)
+    genre = serializers.ListField(child=serializers.SlugField(),
+                                  required=False)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'),
+        default='GET',
+    )
+    path = serializers.RegexField(r'^/api/', max_length=2000)
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = BatchItemSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, requests):
+        if len(requests) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(
+                f'Не больше {settings.BATCH_MAX_REQUESTS} запросов в пакете.'
+            )
+        return requests
+
+
+class ReadOnlyListSerializer(serializers.BaseSerializer):
+    """ Базовый сериализатор для выдачи списков
+
+    Словарь собирается напрямую из атрибутов объекта, без полей DRF:
+    значение поля берет метод get_<поле>, а без него одноименный атрибут.
+    Вывод совпадает с полным сериализатором соответствующей модели.
+    """
+    field_names = ()
+
+    class Meta:
+        list_serializer_class = TimedListSerializer
+
+    @cached_property
+    def getters(self):
+        requested = self.context.get('fields')
+        return [
+            (name, getattr(self, f'get_{name}', None) or attrgetter(name))
+            for name in self.field_names
+            if not requested or name in requested
+        ]
+
+    @cached_property
+    def current_timezone(self):
+        # Часовой пояс определяется один раз на весь список
+        return timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def format_datetime(self, value):
+        """ Дата в ISO 8601, как у DateTimeField из DRF
+        """
+        if self.current_timezone is not None:
+            value = value.astimezone(self.current_timezone)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    def related(self, instance, name):
+        # Предзагруженные объекты берутся без создания нового QuerySet
+        prefetched = getattr(instance, '_prefetched_objects_cache', {})
+        if name in prefetched:
+            return prefetched[name]
+        return getattr(instance, name).all()
+
+    def to_representation(self, instance):
+        return {name: getter(instance) for name, getter in self.getters}
+
+
+class TitleListSerializer(ReadOnlyListSerializer):
+    field_names = TitleSerializer.Meta.fields
+
+    def get_genre(self, title):
+        return [{'name': genre.name, 'slug': genre.slug}
+                for genre in self.related(title, 'genre')]
+
+    def get_category(self, title):
+        category = title.category
+        return category and {'name': category.name, 'slug': category.slug}
+
+
+class RankedTitleSerializer(TitleListSerializer):
+    """ Произведение в списке лучших или обсуждаемых
+    """
+    field_names = TitleListSerializer.field_names + ('score',
+                                                     'recent_reviews')
+
+    def get_score(self, title):
+        return title.score and round(title.score, 2)
+
+
+class ReviewListSerializer(ReadOnlyListSerializer):
+    field_names = ('id', 'author', 'title', 'text', 'score', 'pub_date')
+
+    def get_author(self, review):
+        return review.author.username
+
+    def get_title(self, review):
+        return review.title.name
+
+    def get_pub_date(self, review):
+        return self.format_datetime(review.pub_date)
+
+
+class CommentListSerializer(ReadOnlyListSerializer):
+    field_names = ('id', 'author', 'review', 'text', 'pub_date')
+
+    def get_author(self, comment):
+        return comment.author.username
+
+    def get_review(self, comment):
+        return comment.review_id
+
+    def get_pub_date(self, comment):
+        return self.format_datetime(comment.pub_date)
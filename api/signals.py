@@ -0,0 +1,171 @@
+from collections import Counter
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from . import caching, facets, rankings, ratings
+from .authentication import user_cache
+from .models import Category, Genre, Review, Title, User
+
+
+@receiver(pre_save, sender=Review)
+def lock_review_on_save(sender, instance, raw, **kwargs):
+    if not raw and not instance._state.adding:
+        ratings.lock_rated_state(instance)
+
+
+@receiver(pre_delete, sender=Review)
+def lock_review_on_delete(sender, instance, **kwargs):
+    ratings.lock_rated_state(instance)
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_review_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    rated_title_id = getattr(instance, '_rated_title_id', None)
+    ratings.review_saved(instance, created)
+    if rated_title_id not in (None, instance.title_id):
+        caching.invalidate_objects_on_commit('titles', rated_title_id)
+        caching.on_commit_once(rankings.refresh_rankings, rated_title_id)
+    caching.invalidate_objects_on_commit('titles', instance.title_id)
+    caching.on_commit_once(rankings.refresh_rankings, instance.title_id)
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_review_delete(sender, instance, **kwargs):
+    # Повторное удаление уже удаленного отзыва ничего не вычитает
+    if not ratings.review_deleted(instance):
+        return
+    caching.invalidate_objects_on_commit('titles', instance.title_id)
+    caching.on_commit_once(rankings.refresh_rankings, instance.title_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+
+CATALOG_TABLES = {
+    Category: caching.CATEGORY,
+    Genre: caching.GENRE,
+    Title: caching.TITLE,
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_catalog_version(sender, **kwargs):
+    if sender in CATALOG_TABLES:
+        caching.bump_versions_on_commit(CATALOG_TABLES[sender])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_title_version_on_genres(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if not action.startswith('post_'):
+        return
+    caching.bump_versions_on_commit(caching.TITLE)
+    if not reverse:
+        caching.invalidate_objects_on_commit('titles', instance.pk)
+    else:
+        caching.invalidate_objects_on_commit('titles', *(pk_set or ()))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_cached_title(sender, instance, **kwargs):
+    caching.invalidate_objects_on_commit('titles', instance.pk)
+
+
+FACET_FIELDS = {'category', 'year'}
+
+
+def changes_facets(update_fields):
+    return update_fields is None or bool(FACET_FIELDS & set(update_fields))
+
+
+@receiver(pre_save, sender=Title)
+def remember_title_facets(sender, instance, raw, update_fields, **kwargs):
+    if raw or not facets.tracking() or not changes_facets(update_fields):
+        return
+    instance._facet_counts = facets.field_counts(
+        Title.objects.filter(pk=instance.pk).select_for_update().values_list(
+            'category_id', 'year'
+        )
+    ) if instance.pk is not None else Counter()
+
+
+@receiver(post_save, sender=Title)
+def count_title_facets(sender, instance, raw, update_fields, **kwargs):
+    if raw or not facets.tracking() or not changes_facets(update_fields):
+        return
+    facets.apply_facet_deltas(
+        getattr(instance, '_facet_counts', Counter()),
+        facets.field_counts([(instance.category_id, instance.year)]),
+    )
+
+
+@receiver(pre_delete, sender=Title)
+def remember_deleted_title_facets(sender, instance, **kwargs):
+    # Связи с жанрами удаляются каскадом без m2m_changed
+    if facets.tracking():
+        instance._facet_counts = facets.title_counts([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def uncount_title_facets(sender, instance, **kwargs):
+    if facets.tracking():
+        facets.apply_facet_deltas(instance._facet_counts, Counter())
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def count_genre_facets(sender, instance, action, reverse, pk_set,
+                       **kwargs):
+    if not facets.tracking():
+        return
+    if action in ('pre_remove', 'pre_clear'):
+        # Удаляемые связи, которые действительно есть в базе
+        links = sender.objects.filter(
+            **{'genre_id' if reverse else 'title_id': instance.pk}
+        )
+        if pk_set is not None:
+            links = links.filter(
+                **{'title_id__in' if reverse else 'genre_id__in': pk_set}
+            )
+        instance._unlinked_genres = facets.genre_counts(
+            links.values_list('genre_id', flat=True)
+        )
+    elif action in ('post_remove', 'post_clear'):
+        facets.apply_facet_deltas(instance._unlinked_genres, Counter())
+    elif action == 'post_add':
+        genres = [instance.pk] * len(pk_set) if reverse else pk_set
+        facets.apply_facet_deltas(Counter(), facets.genre_counts(genres))
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Genre)
+def remember_facet_key(sender, instance, raw, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._facet_key = sender.objects.filter(
+        pk=instance.pk
+    ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def rename_facet(sender, instance, created, raw, **kwargs):
+    if raw or created:
+        return
+    facets.rename_facet(sender, getattr(instance, '_facet_key', None)
+                        or instance.slug, instance.slug, instance.name)
+
+
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def drop_facet(sender, instance, **kwargs):
+    # Произведения теряют категорию или жанр без сигналов
+    facets.drop_facet(sender, instance.slug)
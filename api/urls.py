@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentListCreateSet,
-                    CommentRetrieveUpdateDestroyAPIView, GenreViewSet,
-                    MyTokenObtainPairView, PushEmailViewSet,
+from .views import (BatchView, CategoryViewSet, CommentListCreateSet,
+                    CommentRetrieveUpdateDestroyAPIView, ExportView,
+                    GenreViewSet, MyTokenObtainPairView, PushEmailViewSet,
                     ReviewListCreateSet, ReviewRetrieveUpdateDestroyAPIView,
                     TitleViewSet, UsersViewSet)
 
@@ -38,5 +38,7 @@ urlpatterns = [
          CommentRetrieveUpdateDestroyAPIView.as_view(),
          name='review'
          ),
+    path('v1/export/<slug:name>/', ExportView.as_view(), name='export'),
+    path('v1/batch/', BatchView.as_view(), name='batch'),
     path('v1/', include(router_v1.urls)),
 ]
@@ -2,27 +2,44 @@ import random
 import string
 
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, status, viewsets
+from rest_framework import filters, mixins, serializers, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.generics import (RetrieveUpdateDestroyAPIView)
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import SAFE_METHODS, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
 
+from . import rankings
+from .batch import render_results, run_batch
+from .bulk import BulkWriteMixin
+from .caching import (CATEGORY, GENRE, RANKING, TITLE, ConditionalGetMixin,
+                      ResponseCacheMixin)
+from .export import (EXPORTS, INCREMENTAL_EXPORTS, CSVRenderer,
+                     NDJSONRenderer, parse_since, stream_export)
+from .facets import title_facets
+from .fieldsets import SparseFieldsMixin
 from .filters import TitlesFilter
-from .models import Category, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, Review, Title, TitleScores,
+                     User)
+from .outbox import enqueue_email
+from .pagination import FeedPagination
 from .permissions import (IsAdmin, IsAdminOrReadOnly, IsAnon, IsModerator,
                           RetrieveUpdateDestroyPermission, IsOwner)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, PushEmailSerializer,
-                          ReviewSerializer, TitleSerializer,
-                          UsesrsSerializer,
-                          YamdbTokenObtainPairSerializer)
+from .ratings import score_stats
+from .serializers import (BatchSerializer, CategorySerializer,
+                          CommentListSerializer, CommentSerializer,
+                          GenreSerializer,
+                          PushEmailSerializer, RankedTitleSerializer,
+                          ReviewListSerializer, ReviewSerializer,
+                          SlugNamedBulkSerializer, TitleBulkSerializer,
+                          TitleListSerializer, TitleSerializer,
+                          UsesrsSerializer, YamdbTokenObtainPairSerializer)
 
 
 def generate_code():
@@ -40,6 +57,36 @@ class BaseListUpdateViewSet(mixins.ListModelMixin, mixins.UpdateModelMixin,
     pass
 
 
+class ListSerializerMixin:
+    """ Отдает списки облегченным сериализатором только для чтения
+    """
+    list_serializer_class = None
+
+    def get_serializer(self, *args, **kwargs):
+        # Формы браузерного API строятся полным сериализатором
+        if kwargs.get('many') and self.list_serializer_class:
+            kwargs['context'] = self.get_serializer_context()
+            return self.list_serializer_class(*args, **kwargs)
+        return super().get_serializer(*args, **kwargs)
+
+
+class NestedListMixin:
+    """ Список вложенных объектов без отдельной проверки родителя
+
+    Queryset сам фильтрует по цепочке из адреса, существование
+    родителя проверяется, только если страница пуста.
+    """
+
+    def parent_exists(self):
+        raise NotImplementedError
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if not page and not self.parent_exists():
+            raise Http404
+        return page
+
+
 class PushEmailViewSet(BaseCreateViewSet):
     queryset = User.objects.all()
     serializer_class = PushEmailSerializer
@@ -55,12 +102,11 @@ class PushEmailViewSet(BaseCreateViewSet):
 
         user_email = user.email
         confirmation_code = default_token_generator.make_token(user)
-        send_mail(
+        enqueue_email(
             subject='Yours confirmation code',
             message=f'confirmation_code: {confirmation_code}',
             from_email='registration@yamdb.fake',
-            recipient_list=(user_email,),
-            fail_silently=False
+            recipient=user_email,
         )
 
 
@@ -89,7 +135,7 @@ class UsersViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['GET', 'PATCH'], url_path='me',
             permission_classes=(IsOwner, IsAuthenticated,))
     def get_or_update_user(self, request):
-        himself = User.objects.get(username=self.request.user)
+        himself = request.user
         if request.method == 'GET':
             serializer = self.get_serializer(himself)
             return Response(serializer.data)
@@ -101,49 +147,49 @@ class UsersViewSet(viewsets.ModelViewSet):
                 return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ReviewListCreateSet(mixins.ListModelMixin,
+class ReviewListCreateSet(NestedListMixin,
+                          SparseFieldsMixin,
+                          ListSerializerMixin,
+                          mixins.ListModelMixin,
                           mixins.CreateModelMixin,
                           viewsets.GenericViewSet):
     permission_classes = [IsAnon | IsAdmin | IsModerator | IsAuthenticated]
     serializer_class = ReviewSerializer
+    list_serializer_class = ReviewListSerializer
+    pagination_class = FeedPagination
+    sparse_fields = {
+        'id': (),
+        'author': ('author__username',),
+        'title': ('title__name',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_required = ('pub_date',)
 
     def perform_create(self, serializer):
         author = self.request.user
-        text = self.request.data.get('text')
-
         title_id = self.kwargs.get('title_id')
         title = get_object_or_404(Title, id=title_id)
 
-        reviews = Review.objects.filter(author=author, title=title)
-        if reviews.count() > 0:
-            return True
-
-        serializer.save(title=title, author=author, text=text)
+        # Повторный отзыв отсекает уникальное ограничение в базе.
+        # Ошибку ловит только точка сохранения вокруг вставки, пересчеты
+        # после фиксации выполняются уже за пределами try.
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    serializer.save(title=title, author=author)
+            except IntegrityError:
+                raise ValidationError(
+                    'Вы уже оставили отзыв на это произведение.'
+                )
+
+    def parent_exists(self):
+        return Title.objects.filter(id=self.kwargs.get('title_id')).exists()
 
     def get_queryset(self):
         title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        queryset = title.reviews.all()
-        return queryset
-
-    def create(self, request, *args, **kwargs):
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        not_create_success = self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-
-        if not_create_success:
-            return Response(
-                serializer.data,
-                status=status.HTTP_400_BAD_REQUEST,
-                headers=headers
-            )
-        else:
-            return Response(
-                serializer.data,
-                status=status.HTTP_201_CREATED,
-                headers=headers
-            )
+        return self.sparse_queryset(Review.objects.filter(title_id=title_id))
 
 
 class ReviewRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
@@ -159,17 +205,43 @@ class ReviewRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
         return obj
 
     def get_queryset(self):
+        # Принадлежность отзыва произведению проверяется в том же запросе
         title_id = self.kwargs.get('title_id')
-        title = get_object_or_404(Title, id=title_id)
-        queryset = title.reviews.all()
+        queryset = Review.objects.filter(title_id=title_id).select_related(
+            'author', 'title'
+        )
+        if self.request.method not in SAFE_METHODS:
+            # Параллельные правки одного отзыва выполняются по очереди
+            queryset = queryset.select_for_update(of=('self',))
         return queryset
 
+    def update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
 
-class CommentListCreateSet(mixins.ListModelMixin,
+
+class CommentListCreateSet(NestedListMixin,
+                           SparseFieldsMixin,
+                           ListSerializerMixin,
+                           mixins.ListModelMixin,
                            mixins.CreateModelMixin,
                            viewsets.GenericViewSet):
     permission_classes = [IsAnon | IsAdmin | IsModerator | IsAuthenticated]
     serializer_class = CommentSerializer
+    list_serializer_class = CommentListSerializer
+    pagination_class = FeedPagination
+    sparse_fields = {
+        'id': (),
+        'author': ('author__username',),
+        'review': ('review',),
+        'text': ('text',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_required = ('pub_date',)
 
     def perform_create(self, serializer):
         author = self.request.user
@@ -177,17 +249,23 @@ class CommentListCreateSet(mixins.ListModelMixin,
 
         title_id = self.kwargs.get('title_id')
         review_id = self.kwargs.get('review_id')
-        title = get_object_or_404(Title, id=title_id)
-        review = get_object_or_404(title.reviews, id=review_id)
+        review = get_object_or_404(Review.objects.only('id'),
+                                   id=review_id, title_id=title_id)
         serializer.save(review=review, author=author, text=text)
 
+    def parent_exists(self):
+        return Review.objects.filter(
+            id=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id'),
+        ).exists()
+
     def get_queryset(self):
+        # Принадлежность отзыва произведению проверяется в том же запросе
         title_id = self.kwargs.get('title_id')
         review_id = self.kwargs.get('review_id')
-        title = get_object_or_404(Title, id=title_id)
-        review = get_object_or_404(title.reviews.all(), id=review_id)
-        queryset = review.comments.all()
-        return queryset
+        return self.sparse_queryset(Comment.objects.filter(
+            review_id=review_id, review__title_id=title_id
+        ))
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -222,41 +300,197 @@ class CommentRetrieveUpdateDestroyAPIView(RetrieveUpdateDestroyAPIView):
         return obj
 
     def get_queryset(self):
+        # Вся цепочка произведение - отзыв - комментарий в одном запросе
         title_id = self.kwargs.get('title_id')
         review_id = self.kwargs.get('review_id')
-        title = get_object_or_404(Title, id=title_id)
-        review = get_object_or_404(title.reviews.all(), id=review_id)
-        queryset = review.comments
-        return queryset
+        return Comment.objects.filter(
+            review_id=review_id, review__title_id=title_id
+        ).select_related('author')
 
 
-class CategoryViewSet(mixins.CreateModelMixin,
+class CategoryViewSet(BulkWriteMixin,
+                      ConditionalGetMixin,
+                      mixins.CreateModelMixin,
                       mixins.ListModelMixin,
                       mixins.DestroyModelMixin,
                       viewsets.GenericViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    cache_tables = (CATEGORY,)
+    bulk_serializer_class = SlugNamedBulkSerializer
+    bulk_unique = ('slug',)
+    bulk_table = CATEGORY
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [filters.SearchFilter, ]
     search_fields = ['name']
     lookup_field = 'slug'
 
 
-class GenreViewSet(mixins.CreateModelMixin,
+class GenreViewSet(BulkWriteMixin,
+                   ConditionalGetMixin,
+                   mixins.CreateModelMixin,
                    mixins.ListModelMixin,
                    mixins.DestroyModelMixin,
                    viewsets.GenericViewSet):
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    cache_tables = (GENRE,)
+    bulk_serializer_class = SlugNamedBulkSerializer
+    bulk_unique = ('slug',)
+    bulk_table = GENRE
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [filters.SearchFilter, ]
     search_fields = ['name']
     lookup_field = 'slug'
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(ratings=Avg('reviews__score'))
+class TitleViewSet(BulkWriteMixin, SparseFieldsMixin, ListSerializerMixin,
+                   ResponseCacheMixin, ConditionalGetMixin,
+                   viewsets.ModelViewSet):
+    queryset = Title.objects.order_by('id')
     serializer_class = TitleSerializer
+    list_serializer_class = TitleListSerializer
     permission_classes = [IsAdminOrReadOnly]
     filter_backends = [DjangoFilterBackend]
     filterset_class = TitlesFilter
+    cache_tables = (TITLE, GENRE, CATEGORY)
+    cache_prefix = 'titles'
+    detail_cache_tables = (GENRE, CATEGORY)
+    sparse_fields = {
+        'id': (),
+        'name': ('name',),
+        'year': ('year',),
+        'rating': ('rating_sum', 'rating_count'),
+        'description': ('description',),
+        'category': ('category__name', 'category__slug'),
+    }
+    sparse_prefetch = {'genre': 'genre'}
+    bulk_serializer_class = TitleBulkSerializer
+    bulk_lookup = 'id'
+    bulk_key_field = serializers.IntegerField(min_value=1)
+    bulk_relations = {'category': (Category, False), 'genre': (Genre, True)}
+    bulk_table = TITLE
+    bulk_facets = True
+
+    def get_queryset(self):
+        return self.sparse_queryset(super().get_queryset())
+
+    def get_cache_tables(self):
+        # Рейтинги пересчитываются после каждого отзыва отдельно от
+        # таблицы произведений
+        if self.action in ('top', 'trending'):
+            return (*self.cache_tables, RANKING)
+        return self.cache_tables
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    @action(detail=True, methods=['GET'])
+    def stats(self, request, pk):
+        """ Распределение оценок, средняя и медиана по отзывам произведения
+        """
+        return self.conditional(self.get_stats, request, pk)
+
+    def get_stats(self, request, pk):
+        # Гистограмма ведется вместе с отзывами, отзывы не читаются
+        if not pk.isdigit():
+            raise Http404
+        scores = TitleScores.objects.filter(title_id=pk).first()
+        if scores is None:
+            # Отзывов на произведение еще нет
+            get_object_or_404(Title.objects.only('id'), pk=pk)
+            scores = TitleScores(title_id=pk)
+        return Response(score_stats(scores.counts))
+
+    @action(detail=False, methods=['GET'])
+    def facets(self, request):
+        """ Число произведений по жанрам, категориям и десятилетиям
+        """
+        return self.conditional(self.get_facets, request)
+
+    def get_facets(self, request):
+        # Без фильтров счетчики берутся из сводной таблицы
+        filtered = any(request.query_params.get(name)
+                       for name in self.filterset_class.base_filters)
+        titles = self.filter_queryset(Title.objects.all()) \
+            if filtered else None
+        return Response(title_facets(titles))
+
+    @action(detail=False, methods=['GET'])
+    def top(self, request):
+        """ Лучшие произведения по байесовской средней оценке
+        """
+        return self.conditional(self.get_ranking, request,
+                                rankings.top_rated)
+
+    @action(detail=False, methods=['GET'])
+    def trending(self, request):
+        """ Произведения с наибольшим числом свежих отзывов
+        """
+        return self.conditional(self.get_ranking, request,
+                                rankings.trending)
+
+    def get_ranking(self, request, ranking):
+        # Фильтры те же, что у списка, порядок задает таблица рейтингов
+        limit = rankings.RANKING_MAX_LIMIT
+        try:
+            limit = int(request.query_params.get('limit', limit))
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= rankings.RANKING_MAX_LIMIT:
+            raise ValidationError(
+                {'limit': f'Число от 1 до {rankings.RANKING_MAX_LIMIT}.'}
+            )
+        titles = ranking(self.filter_queryset(Title.objects.all()))
+        serializer = RankedTitleSerializer(titles[:limit], many=True)
+        return Response(serializer.data)
+
+
+class ExportView(APIView):
+    """ Потоковая выгрузка произведений или отзывов в NDJSON или CSV
+    """
+    # Те же данные, что в публичных списках, только для чтения
+    permission_classes = [IsAdminOrReadOnly]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request, name):
+        if name not in EXPORTS:
+            raise Http404
+        since = request.query_params.get('since')
+        if since:
+            if name not in INCREMENTAL_EXPORTS:
+                raise ValidationError(
+                    {'since': 'Выгрузка произведений не бывает частичной.'}
+                )
+            try:
+                since = parse_since(since)
+            except ValueError as error:
+                raise ValidationError({'since': str(error)})
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            stream_export(name, renderer.format, since or None),
+            content_type=f'{renderer.media_type}; charset=utf-8',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{renderer.format}"'
+        )
+        return response
+
+
+class BatchView(APIView):
+    """ Несколько запросов к API за один вызов
+
+    Вложенные запросы выполняются от имени того же пользователя,
+    ответы возвращаются списком в порядке запросов.
+    """
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = run_batch(
+            request, serializer.validated_data['requests'],
+            parallel=serializer.validated_data['parallel'],
+            exclude=(BatchView,),
+        )
+        return HttpResponse(render_results(results),
+                            content_type='application/json')
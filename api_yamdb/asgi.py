@@ -7,10 +7,143 @@ For more information on this file, see
 https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core import signals
+from django.core.exceptions import RequestAborted
+from django.core.handlers.asgi import ASGIHandler
+from django.urls import set_script_prefix
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+
+class ResponseStream:
+    """ Передает ответ и куски тела из потока пула в цикл событий
+
+    Очередь ограничена: поток ждет медленного клиента, а не копит
+    ответ в памяти. После close поток получает RequestAborted.
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+        self.closed = False
+
+    def put(self, item):
+        if self.closed:
+            raise RequestAborted
+        asyncio.run_coroutine_threadsafe(self.queue.put(item),
+                                         self.loop).result()
+
+    def finish(self):
+        if not self.closed:
+            self.put(None)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        # Освобождает место для куска, который поток мог начать отправлять
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+
+class ThreadPoolASGIHandler(ASGIHandler):
+    """ Соединения обслуживает цикл событий, представления - пул потоков
+
+    Django 3.0 и DRF не умеют асинхронных представлений, а стандартный
+    обработчик с новым asgiref выполняет все запросы в одном потоке.
+    Здесь запрос целиком, вместе с сигналами начала и конца и чтением
+    потокового ответа, выполняется в одном потоке из ограниченного пула,
+    поэтому курсор выгрузки и close_old_connections относятся к
+    соединению того же потока. Медленные клиенты и keep-alive потоки
+    не занимают, пока ответ не потоковый.
+    """
+    stream_buffer = 8
+
+    def __init__(self, threads):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(threads,
+                                           thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            raise ValueError(
+                f'Django can only handle ASGI/HTTP connections, '
+                f'not {scope["type"]}.'
+            )
+        try:
+            body_file = await self.read_body(receive)
+        except RequestAborted:
+            return
+        loop = asyncio.get_event_loop()
+        stream = ResponseStream(loop, self.stream_buffer)
+        task = loop.run_in_executor(self.executor, self.handle,
+                                    scope, body_file, stream)
+        try:
+            response = await stream.get()
+            if response is not None:
+                await self.send_response(response, stream, send)
+        finally:
+            stream.close()
+        # Пробрасывает ошибку потока, если ответа не было
+        await task
+
+    def handle(self, scope, body_file, stream):
+        response = None
+        try:
+            set_script_prefix(self.get_script_prefix(scope))
+            signals.request_started.send(sender=self.__class__, scope=scope)
+            request, error_response = self.create_request(scope, body_file)
+            response = error_response if request is None else \
+                self.get_response(request)
+            response._handler_class = self.__class__
+            stream.put(response)
+            if response.streaming:
+                # Куски читаются из базы в потоке, открывшем курсор
+                for chunk in response:
+                    stream.put(chunk)
+        except RequestAborted:
+            # Клиент отключился, недочитанный ответ закрывается ниже
+            pass
+        finally:
+            if response is not None:
+                response.close()
+            stream.finish()
+
+    def response_start(self, response):
+        return {
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [
+                (name.encode('latin-1'), value.encode('latin-1'))
+                for name, value in response.items()
+            ] + [
+                (b'Set-Cookie', cookie.output(header='').encode('ascii'))
+                for cookie in response.cookies.values()
+            ],
+        }
+
+    async def send_response(self, response, stream, send):
+        await send(self.response_start(response))
+        if not response.streaming:
+            await send({'type': 'http.response.body',
+                        'body': response.content})
+            return
+        while True:
+            chunk = await stream.get()
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk,
+                        'more_body': True})
+        await send({'type': 'http.response.body'})
+
+
+django.setup(set_prefix=False)
+application = ThreadPoolASGIHandler(
+    int(os.environ.get('ASGI_THREADS', 10))
+)
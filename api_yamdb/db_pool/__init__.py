@@ -0,0 +1,4 @@
+""" PostgreSQL с пулом соединений внутри процесса
+
+    ENGINE = 'api_yamdb.db_pool', параметры пула в ключе POOL настроек базы.
+"""
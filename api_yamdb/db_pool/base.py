@@ -0,0 +1,92 @@
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from .pool import ConnectionPool, PoolTimeout
+
+Database = base.Database
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def is_usable(connection):
+    if connection.closed:
+        return False
+    try:
+        connection.cursor().execute('SELECT 1')
+        reset(connection)
+    except Database.Error:
+        return False
+    return True
+
+
+def reset(connection):
+    # Незавершенная транзакция не должна достаться следующему запросу
+    if connection.closed:
+        raise Database.InterfaceError('connection already closed')
+    status = connection.get_transaction_status()
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+def get_pool(alias, conn_params, options):
+    # После fork воркера gunicorn соединения родителя не используются
+    key = (os.getpid(), alias, tuple(sorted(conn_params.items())))
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(
+                lambda: Database.connect(**conn_params),
+                is_usable=is_usable,
+                reset=reset,
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 5),
+                check_after=options.get('CHECK_AFTER', 30),
+                max_lifetime=options.get('MAX_LIFETIME', 3600),
+            )
+        return pools[key]
+
+
+def pool_stats():
+    """ Метрики пулов текущего процесса по псевдонимам баз
+    """
+    pid = os.getpid()
+    with pools_lock:
+        current = [(key[1], pool) for key, pool in pools.items()
+                   if key[0] == pid]
+    return {alias: pool.stats() for alias, pool in current}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """ Берет соединения из пула и возвращает их туда вместо закрытия
+
+    CONN_MAX_AGE стоит держать равным 0: соединение возвращается в пул
+    в конце каждого запроса и достается любому потоку процесса.
+    """
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(self.alias, conn_params,
+                             self.settings_dict.get('POOL', {}))
+        try:
+            connection = self.pool.acquire()
+        except PoolTimeout as error:
+            raise Database.OperationalError(str(error)) from error
+
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            self.pool.release(self.connection,
+                              broken=bool(self.connection.closed))
@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """ Пул соединений процесса с ограничением размера и проверкой
+
+    Свободные соединения выдаются в порядке LIFO. Соединение, пролежавшее
+    без дела дольше check_after секунд, перед выдачей проверяется
+    is_usable, а прожившее дольше max_lifetime закрывается.
+    """
+
+    def __init__(self, connect, is_usable=None, reset=None, max_size=10,
+                 timeout=5.0, check_after=30.0, max_lifetime=3600.0):
+        self.connect = connect
+        self.is_usable = is_usable or (lambda connection: True)
+        self.reset = reset or (lambda connection: None)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_lifetime = max_lifetime
+
+        self.condition = threading.Condition()
+        self.idle = deque()
+        self.in_use = {}
+        self.size = 0
+        self.created = 0
+        self.closed = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        while True:
+            candidate = None
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise PoolTimeout(
+                            f'Нет свободных соединений за {self.timeout} с, '
+                            f'занято {len(self.in_use)} из {self.max_size}'
+                        )
+                    if not waited:
+                        waited = True
+                        self.waits += 1
+                    self.condition.wait(remaining)
+                if self.idle:
+                    candidate = self.idle.pop()
+                else:
+                    self.size += 1
+
+            if candidate is None:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    with self.condition:
+                        self.size -= 1
+                        self.condition.notify()
+                    raise
+                born = time.monotonic()
+                with self.condition:
+                    self.created += 1
+                return self.check_out(connection, born, started)
+
+            connection, born, released = candidate
+            now = time.monotonic()
+            # Проверка вне блокировки: это запрос к базе
+            if (now - born < self.max_lifetime and
+                    (now - released < self.check_after or
+                     self.is_usable(connection))):
+                return self.check_out(connection, born, started)
+            self.discard(connection)
+
+    def check_out(self, connection, born, started):
+        waited = time.monotonic() - started
+        with self.condition:
+            self.in_use[id(connection)] = born
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+        return connection
+
+    def release(self, connection, broken=False):
+        with self.condition:
+            born = self.in_use.pop(id(connection))
+        if not broken:
+            try:
+                self.reset(connection)
+            except Exception:
+                broken = True
+        if broken or time.monotonic() - born >= self.max_lifetime:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, born, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self.condition:
+            self.size -= 1
+            self.closed += 1
+            self.condition.notify()
+
+    def close_idle(self):
+        with self.condition:
+            idle = [connection for connection, _, _ in self.idle]
+            self.idle.clear()
+        for connection in idle:
+            self.discard(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': len(self.in_use),
+                'idle': len(self.idle),
+                'created': self.created,
+                'closed': self.closed,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'wait_ms_total': round(self.wait_time * 1000, 2),
+                'wait_ms_max': round(self.max_wait * 1000, 2),
+            }
@@ -0,0 +1,127 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from api_yamdb.db_pool.base import pool_stats
+
+logger = logging.getLogger('api_yamdb.timing')
+
+current_timing = ContextVar('current_timing', default=None)
+
+
+class RequestTiming:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_started = None
+        self.render_time = 0.0
+        self.serialize_time = 0.0
+
+    def track_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response):
+        self.render_time += time.perf_counter() - self.render_started
+
+
+@contextmanager
+def timed_serialization():
+    """ Учитывает время блока как сериализацию текущего запроса
+    """
+    timing = current_timing.get()
+    if timing is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.serialize_time += time.perf_counter() - started
+
+
+def can_see_timing(request):
+    # Время запросов к базе не показывается посторонним клиентам
+    if settings.DEBUG:
+        return True
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and
+                (user.is_staff or user.role == user.ADMIN))
+
+
+class RequestTimingMiddleware:
+    """ Число SQL-запросов, время БД, сериализации, рендеринга и всего
+
+    Метрики выборки запросов (REQUEST_TIMING_SAMPLE_RATE) пишутся строкой
+    JSON в логгер api_yamdb.timing. Заголовок Server-Timing получают
+    только администраторы, а с DEBUG - все клиенты.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.REQUEST_TIMING_SAMPLE_RATE
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        timing = request.timing = RequestTiming()
+        token = current_timing.set(timing)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timing.track_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_timing.reset(token)
+        total = time.perf_counter() - timing.started
+
+        if can_see_timing(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={timing.db_time * 1000:.1f};'
+                f'desc="{timing.queries} queries"',
+                f'serialize;dur={timing.serialize_time * 1000:.1f}',
+                f'render;dur={timing.render_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        match = request.resolver_match
+        record = {
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': timing.queries,
+            'db_ms': round(timing.db_time * 1000, 2),
+            'serialize_ms': round(timing.serialize_time * 1000, 2),
+            'render_ms': round(timing.render_time * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+        }
+        pools = pool_stats()
+        if pools:
+            record['db_pool'] = pools
+        logger.info(json.dumps(record))
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответы DRF рендерятся после выхода из представления
+        timing = getattr(request, 'timing', None)
+        if timing is not None:
+            timing.start_render()
+            response.add_post_render_callback(timing.finish_render)
+        return response
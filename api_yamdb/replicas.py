@@ -0,0 +1,120 @@
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PIN_COOKIE = 'pin_primary'
+PIN_KEY = 'replicas:pin:{}'
+
+state = threading.local()
+
+
+def current_replica():
+    """ Реплика для чтения в текущем запросе или None
+    """
+    replica = getattr(state, 'replica', None)
+    if replica is None or getattr(state, 'wrote', False):
+        return None
+    # Внутри транзакции читаем то же, что только что записали
+    if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+        return None
+    return replica
+
+
+def pin_user(user_id):
+    cache.set(PIN_KEY.format(user_id), True,
+              timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def use_primary_if_pinned(user_id):
+    """ Переводит чтение запроса на основную базу после записи автора
+
+    Вызывается после аутентификации, когда пользователь уже известен.
+    """
+    if getattr(state, 'replica', None) is None:
+        return
+    if cache.get(PIN_KEY.format(user_id)):
+        state.replica = None
+
+
+def read_only_request(request):
+    """ Отправляет на реплику запрос, который не пишет несмотря на метод
+
+    Например, пакет из одних чтений приходит POST-запросом. Закрепление
+    за основной базой по cookie и по пользователю сохраняется.
+    """
+    replicas = settings.DATABASE_REPLICAS
+    state.read_only = True
+    if not replicas or PIN_COOKIE in request.COOKIES or \
+            getattr(state, 'wrote', False):
+        return
+    state.replica = random.choice(replicas)
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        use_primary_if_pinned(user.pk)
+
+
+class ReplicaRouter:
+    """ Чтение в безопасных запросах уходит на реплики, запись на основную
+
+    Вне запросов (миграции, команды) все обращения идут в основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        return current_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """ Выбирает реплику на время запроса
+
+    После записи пользователь на REPLICA_PIN_SECONDS закрепляется за
+    основной базой, чтобы видеть свои изменения. Клиенты с JWT обычно
+    не хранят cookie, поэтому закрепление хранится в кэше по id
+    пользователя, а cookie остается для анонимных запросов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replicas = settings.DATABASE_REPLICAS
+        pinned = PIN_COOKIE in request.COOKIES
+        state.replica = (
+            random.choice(replicas)
+            if replicas and request.method in SAFE_METHODS and not pinned
+            else None
+        )
+        state.wrote = False
+        state.read_only = False
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = state.wrote
+            read_only = state.read_only
+            state.replica = None
+            state.wrote = False
+            state.read_only = False
+
+        # Пакет из одних чтений приходит POST-запросом, но не закрепляет
+        if not read_only and request.method not in SAFE_METHODS:
+            wrote = True
+        if replicas and wrote:
+            # DRF подставляет пользователя из токена в исходный запрос
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_user(user.pk)
+            response.set_cookie(PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
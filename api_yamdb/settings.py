@@ -32,12 +32,15 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_filters',
     'api',
 ]
 
 MIDDLEWARE = [
+    'api_yamdb.middleware.RequestTimingMiddleware',
+    'api_yamdb.replicas.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,9 +82,43 @@ DATABASES = {
         'PASSWORD': os.environ.get('POSTGRES_PASSWORD'),
         'HOST': os.environ.get('DB_HOST'),
         'PORT': os.environ.get('DB_PORT'),
+        # Постоянные соединения: секунды жизни, 0 закрывает после запроса
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=0),
     }
 }
 
+# Пул соединений в процессе вместо постоянного соединения на поток
+if env.bool('DB_POOL', default=False):
+    DATABASES['default'].update({
+        'ENGINE': 'api_yamdb.db_pool',
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': env.int('DB_POOL_MAX_SIZE', default=10),
+            'TIMEOUT': env.float('DB_POOL_TIMEOUT', default=5.0),
+            'CHECK_AFTER': env.float('DB_POOL_CHECK_AFTER', default=30.0),
+            'MAX_LIFETIME': env.float('DB_POOL_MAX_LIFETIME',
+                                      default=3600.0),
+        },
+    })
+
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1,replica2:5433
+DATABASE_REPLICAS = []
+for number, address in enumerate(env.list('DB_REPLICA_HOSTS', default=[])):
+    host, _, port = address.partition(':')
+    alias = f'replica{number + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['api_yamdb.replicas.ReplicaRouter']
+
+# Сколько секунд после записи клиент читает из основной базы
+REPLICA_PIN_SECONDS = env.int('REPLICA_PIN_SECONDS', default=5)
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
@@ -122,7 +159,16 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
@@ -138,6 +184,65 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=60)
 }
 
+# В продакшене кэш общий для всех процессов, например Redis
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=300)
+
+# Доля запросов, для которых собираются Server-Timing и лог метрик
+REQUEST_TIMING_SAMPLE_RATE = env.float('REQUEST_TIMING_SAMPLE_RATE',
+                                       default=0.01)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'api_yamdb.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# Сколько секунд nginx и клиенты могут не перепроверять каталог
+CATALOG_CACHE_MAX_AGE = env.int('CATALOG_CACHE_MAX_AGE', default=10)
+
+# Минимум отзывов для попадания в лучшие и вес средней оценки каталога
+RANKING_MIN_REVIEWS = env.int('RANKING_MIN_REVIEWS', default=5)
+# За сколько дней считаются свежие отзывы для обсуждаемых произведений
+TRENDING_WINDOW_DAYS = env.int('TRENDING_WINDOW_DAYS', default=7)
+
+# Предел объектов в одном запросе массовой записи каталога
+BULK_MAX_ITEMS = env.int('BULK_MAX_ITEMS', default=5000)
+
+# Запросов в одном пакете /api/v1/batch/ и потоков для параллельных чтений
+BATCH_MAX_REQUESTS = env.int('BATCH_MAX_REQUESTS', default=20)
+BATCH_MAX_WORKERS = env.int('BATCH_MAX_WORKERS', default=4)
+
+USER_CACHE = {
+    'MAX_SIZE': env.int('USER_CACHE_MAX_SIZE', default=1024),
+    'TIMEOUT': env.int('USER_CACHE_TIMEOUT', default=60),
+}
+
 AUTH_USER_MODEL = 'api.User'
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
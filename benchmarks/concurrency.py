@@ -0,0 +1,162 @@
+""" Пропускная способность gunicorn в режимах wsgi и asgi при конкуренции
+
+    python -m benchmarks.concurrency --concurrency 10 100 500
+
+Заполняет базу из --settings, если она пуста (по умолчанию отдельный файл
+SQLite из benchmarks.settings), запускает gunicorn с gunicorn.conf.py
+в каждом режиме и нагружает эндпоинты каталога асинхронным клиентом.
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def prepare(settings, titles, reviews):
+    """ Миграции и данные, возвращает пути для нагрузки
+    """
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings
+    sys.path.insert(0, ROOT)
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+
+    from api.models import Title
+    from benchmarks.dataset import seed
+
+    call_command('migrate', verbosity=0)
+    if not Title.objects.exists():
+        seed(titles=titles, reviews=reviews, comments=reviews // 10)
+    title_id = Title.objects.order_by('id').values_list('id', flat=True)[0]
+    return [
+        '/api/v1/categories/',
+        '/api/v1/genres/',
+        '/api/v1/titles/?page=2',
+        f'/api/v1/titles/{title_id}/reviews/',
+    ]
+
+
+async def fetch(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: {host}\r\n'
+            f'Accept: application/json\r\nConnection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        data = await reader.read()
+    finally:
+        writer.close()
+    return int(data.split(b' ', 2)[1])
+
+
+async def load(host, port, paths, concurrency, requests):
+    latencies = []
+    statuses = {}
+    counter = iter(range(requests))
+
+    async def user():
+        for number in counter:
+            started = time.perf_counter()
+            try:
+                status = await fetch(host, port, paths[number % len(paths)])
+            except OSError:
+                status = 'error'
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'rps': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'statuses': {str(key): value for key, value in statuses.items()},
+    }
+
+
+def start_server(mode, settings, port, workers, threads):
+    # Потоков в обоих режимах поровну: gthread против пула ASGI
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=settings,
+        SERVER_MODE=mode,
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_THREADS=str(threads),
+        ASGI_THREADS=str(threads),
+    )
+    if mode == 'asgi' and not importlib.util.find_spec('uvloop'):
+        env.setdefault('GUNICORN_WORKER_CLASS',
+                       'uvicorn.workers.UvicornH11Worker')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(port, path, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if asyncio.run(fetch('127.0.0.1', port, path)) == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'Сервер на порту {port} не запустился')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default='benchmarks.settings')
+    parser.add_argument('--modes', nargs='*', default=['wsgi', 'asgi'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=10,
+                        help='Потоков на воркер в обоих режимах')
+    parser.add_argument('--concurrency', type=int, nargs='*',
+                        default=[10, 100, 500])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    paths = prepare(args.settings, args.titles, args.reviews)
+    results = {}
+    for mode in args.modes:
+        server = start_server(mode, args.settings, args.port, args.workers,
+                              args.threads)
+        try:
+            wait_ready(args.port, paths[0])
+            results[mode] = [
+                asyncio.run(load('127.0.0.1', args.port, paths, level,
+                                 args.requests))
+                for level in args.concurrency
+            ]
+        finally:
+            server.terminate()
+            server.wait()
+    print(json.dumps({'workers': args.workers, 'asgi_threads': args.threads,
+                      'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
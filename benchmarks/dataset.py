@@ -0,0 +1,120 @@
+import math
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from api import caching
+from api.facets import refresh_facets
+from api.management.loading import keep_pub_date
+from api.models import Category, Comment, Genre, Review, Title, User
+from api.rankings import refresh_rankings
+from api.ratings import recalculate_ratings
+
+BENCH_EMAIL = 'bench@yamdb.fake'
+BENCH_CODE = 'FOOBAR'
+
+
+def insert(model, objects, batch_size):
+    total = 0
+    while True:
+        chunk = list(islice(objects, batch_size))
+        if not chunk:
+            return total
+        with transaction.atomic():
+            model.objects.bulk_create(chunk)
+        total += len(chunk)
+
+
+def seed(titles=1000, reviews=10000, comments=1000, genres=20,
+         categories=5, users=None, batch_size=5000, seed_value=42):
+    """ Заполняет базу синтетическими данными, возвращает размеры
+
+    Отзыв i относится к произведению i % titles от автора i // titles,
+    поэтому пара (произведение, автор) уникальна.
+    """
+    started = time.monotonic()
+    rnd = random.Random(seed_value)
+    users = max(users or 0, math.ceil(reviews / titles) if titles else 0, 1)
+    now = timezone.now()
+    password = make_password(None)
+
+    bench_user = User.objects.create_user(
+        username='bench', email=BENCH_EMAIL, password=BENCH_CODE,
+        confirmation_code=BENCH_CODE,
+    )
+    insert(User, (
+        User(username=f'user{number}', email=f'user{number}@yamdb.fake',
+             password=password)
+        for number in range(users)
+    ), batch_size)
+    user_ids = list(User.objects.exclude(pk=bench_user.pk).order_by(
+        'id'
+    ).values_list('id', flat=True))
+
+    insert(Category, (
+        Category(name=f'Категория {number}', slug=f'category-{number}')
+        for number in range(categories)
+    ), batch_size)
+    insert(Genre, (
+        Genre(name=f'Жанр {number}', slug=f'genre-{number}')
+        for number in range(genres)
+    ), batch_size)
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    genre_ids = list(Genre.objects.values_list('id', flat=True))
+
+    insert(Title, (
+        Title(name=f'Произведение {number}', year=1950 + number % 70,
+              description=f'Описание произведения {number}',
+              category_id=rnd.choice(category_ids))
+        for number in range(titles)
+    ), batch_size)
+    title_ids = list(Title.objects.order_by('id').values_list('id',
+                                                              flat=True))
+
+    through = Title.genre.through
+    insert(through, (
+        through(title_id=title_id, genre_id=genre_id)
+        for title_id in title_ids
+        for genre_id in rnd.sample(genre_ids, min(2, len(genre_ids)))
+    ), batch_size)
+
+    with keep_pub_date(Review):
+        insert(Review, (
+            Review(title_id=title_ids[number % titles],
+                   author_id=user_ids[number // titles],
+                   text=f'Отзыв {number}', score=rnd.randint(1, 10),
+                   pub_date=now - timedelta(minutes=number))
+            for number in range(reviews)
+        ), batch_size)
+    review_ids = list(Review.objects.order_by('id').values_list('id',
+                                                                flat=True))
+
+    if review_ids:
+        with keep_pub_date(Comment):
+            insert(Comment, (
+                Comment(review_id=rnd.choice(review_ids),
+                        author_id=rnd.choice(user_ids),
+                        text=f'Комментарий {number}',
+                        pub_date=now - timedelta(minutes=number))
+                for number in range(comments)
+            ), batch_size)
+
+    recalculate_ratings()
+    refresh_facets()
+    refresh_rankings()
+    caching.bump_versions(caching.CATEGORY, caching.GENRE, caching.TITLE,
+                          caching.RANKING)
+    return {
+        'titles': titles,
+        'reviews': reviews,
+        'comments': comments if review_ids else 0,
+        'users': users,
+        'genres': genres,
+        'categories': categories,
+        'seconds': round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,99 @@
+""" Сравнение времени кодирования JSON для страницы из 100 произведений
+
+    python -m benchmarks.renderers --settings tests.settings_qa
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def title_page(size=100):
+    return {
+        'count': 100000,
+        'next': 'http://testserver/api/v1/titles/?page=2',
+        'previous': None,
+        'results': [
+            {
+                'id': number,
+                'name': f'Произведение {number}',
+                'year': 1950 + number % 70,
+                'rating': number % 10 or None,
+                'description': 'Описание произведения ' * 10,
+                'genre': [{'name': 'Драма', 'slug': 'drama'},
+                          {'name': 'Комедия', 'slug': 'comedy'}],
+                'category': {'name': 'Фильм', 'slug': 'movie'},
+            }
+            for number in range(size)
+        ],
+    }
+
+
+def review_page(size=100):
+    return {
+        'count': 5000000,
+        'next': 'http://testserver/api/v1/titles/1/reviews/?page=2',
+        'previous': None,
+        'results': [
+            {
+                'id': number,
+                'author': f'user{number}',
+                'title': 'Побег из Шоушенка',
+                'text': 'Ставлю десять звёзд! ' * 20,
+                'score': number % 10 + 1,
+                'pub_date': '2019-09-24T21:08:21.567000Z',
+            }
+            for number in range(size)
+        ],
+    }
+
+
+def timed(renderer, data, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        renderer.render(data)
+    return (time.perf_counter() - started) / repeat
+
+
+def compare(size=100, repeat=500):
+    from rest_framework.renderers import JSONRenderer
+
+    from api.renderers import FastJSONRenderer
+
+    results = {}
+    for name, data in (('titles', title_page(size)),
+                       ('reviews', review_page(size))):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+        stdlib = timed(JSONRenderer(), data, repeat)
+        fast = timed(FastJSONRenderer(), data, repeat)
+        results[name] = {
+            'rows': size,
+            'stdlib_us': round(stdlib * 1e6, 1),
+            'fast_us': round(fast * 1e6, 1),
+            'speedup': round(stdlib / fast, 1),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default=os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'api_yamdb.settings'
+    ))
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)
+    )))
+    import django
+    django.setup()
+
+    print(json.dumps(compare(args.rows, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+""" Нагрузочный прогон основных эндпоинтов API
+
+    python -m benchmarks.run --settings tests.settings_qa \
+        --titles 100000 --reviews 5000000 --output bench.json
+
+Создает отдельную тестовую базу, заполняет ее синтетическими данными,
+прогоняет сценарии через тестовый клиент Django и печатает JSON с
+задержками (p50/p95/p99), пропускной способностью и числом запросов.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(share * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(name, client, make_request, requests, warmup=5,
+            close_connections=False):
+    from django.db import close_old_connections, connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        make_request(client)
+
+    latencies = []
+    queries = 0
+    statuses = set()
+    started = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            request_started = time.perf_counter()
+            response = make_request(client)
+            if close_connections:
+                # Как WSGI-сервер в конце запроса: по CONN_MAX_AGE
+                # соединение закрывается или возвращается в пул
+                close_old_connections()
+            latencies.append(time.perf_counter() - request_started)
+        queries += len(captured)
+        statuses.add(response.status_code)
+    elapsed = time.perf_counter() - started
+
+    return name, {
+        'requests': requests,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / requests * 1000, 3),
+        'rps': round(requests / elapsed, 1),
+        'queries_per_request': round(queries / requests, 2),
+        'statuses': sorted(statuses),
+    }
+
+
+def scenarios(seed_value=42):
+    """ Сценарии: имя и функция, выполняющая один запрос клиентом
+    """
+    from django.db.models import Count
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from api.models import Genre, Review, Title, User
+    from benchmarks.dataset import BENCH_CODE, BENCH_EMAIL
+
+    rnd = random.Random(seed_value)
+    title_ids = list(Title.objects.values_list('id', flat=True)[:10000])
+    genre_slugs = list(Genre.objects.values_list('slug', flat=True))
+    reviewed = list(Title.objects.filter(rating_count__gt=0).values_list(
+        'id', flat=True
+    )[:1000])
+    commented = list(Review.objects.annotate(
+        comments_total=Count('comments')
+    ).filter(comments_total__gt=0).values_list('title_id', 'id')[:1000])
+    bench_user = User.objects.get(email=BENCH_EMAIL)
+    auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(bench_user)}'}
+    unreviewed = iter(Title.objects.exclude(
+        reviews__author=bench_user
+    ).values_list('id', flat=True).iterator())
+
+    def title_list(client):
+        genre = rnd.choice(genre_slugs)
+        return client.get(f'/api/v1/titles/?genre={genre}')
+
+    def title_detail(client):
+        return client.get(f'/api/v1/titles/{rnd.choice(title_ids)}/')
+
+    def review_list(client):
+        return client.get(f'/api/v1/titles/{rnd.choice(reviewed)}/reviews/')
+
+    def comment_list(client):
+        title_id, review_id = rnd.choice(commented)
+        return client.get(
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        )
+
+    def review_create(client):
+        return client.post(
+            f'/api/v1/titles/{next(unreviewed)}/reviews/',
+            {'text': 'Отзыв из бенчмарка', 'score': 7}, **auth
+        )
+
+    def token_obtain(client):
+        return client.post('/api/v1/auth/token/', {
+            'email': BENCH_EMAIL, 'confirmation_code': BENCH_CODE
+        })
+
+    available = [
+        ('title_list', title_list, title_ids and genre_slugs),
+        ('title_detail', title_detail, title_ids),
+        ('review_list', review_list, reviewed),
+        ('comment_list', comment_list, commented),
+        ('review_create', review_create, title_ids),
+        ('token_obtain', token_obtain, True),
+    ]
+    return [(name, func) for name, func, ready in available if ready]
+
+
+def run_scenarios(requests=200, warmup=5, only=None, seed_value=42,
+                  close_connections=False):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    results = {}
+    for name, make_request in scenarios(seed_value):
+        if only and name not in only:
+            continue
+        name, result = measure(name, client, make_request, requests, warmup,
+                               close_connections)
+        results[name] = result
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default=os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'api_yamdb.settings'
+    ))
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=1000)
+    parser.add_argument('--genres', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', nargs='*',
+                        help='Запустить только эти сценарии')
+    parser.add_argument('--keepdb', action='store_true',
+                        help='Не удалять тестовую базу после прогона')
+    parser.add_argument(
+        '--close-connections', action='store_true',
+        help='Закрывать соединения после запроса по CONN_MAX_AGE, '
+             'как это делает сервер приложений'
+    )
+    parser.add_argument('--output', help='Файл для JSON-результата')
+    args = parser.parse_args(argv)
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)
+    )))
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    from api_yamdb.db_pool.base import pool_stats
+    from benchmarks.dataset import seed
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=args.keepdb)
+    try:
+        from api.models import Title
+        dataset = None
+        if not (args.keepdb and Title.objects.exists()):
+            dataset = seed(titles=args.titles, reviews=args.reviews,
+                           comments=args.comments, genres=args.genres)
+        results = run_scenarios(args.requests, args.warmup, args.only,
+                                close_connections=args.close_connections)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0,
+                                            keepdb=args.keepdb)
+        teardown_test_environment()
+
+    report = {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'conn_max_age': connection.settings_dict['CONN_MAX_AGE'],
+        'db_pool': pool_stats(),
+        'dataset': dataset,
+        'results': results,
+    }
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as report_file:
+            report_file.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
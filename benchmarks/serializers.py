@@ -0,0 +1,86 @@
+""" Время сериализации 100 строк полным и облегченным сериализатором
+
+    python -m benchmarks.serializers --settings tests.settings_qa
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def timed(serializer_class, objects, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        serializer_class(objects, many=True).data
+    return (time.perf_counter() - started) / repeat
+
+
+def compare(rows=100, repeat=200):
+    from api.models import Comment, Review, Title
+    from api.serializers import (CommentListSerializer, CommentSerializer,
+                                 ReviewListSerializer, ReviewSerializer,
+                                 TitleListSerializer, TitleSerializer)
+
+    cases = (
+        ('titles', TitleSerializer, TitleListSerializer,
+         Title.objects.select_related('category').prefetch_related('genre')),
+        ('reviews', ReviewSerializer, ReviewListSerializer,
+         Review.objects.select_related('author', 'title')),
+        ('comments', CommentSerializer, CommentListSerializer,
+         Comment.objects.select_related('author')),
+    )
+    results = {}
+    for name, full, light, queryset in cases:
+        # Строки загружаются один раз: измеряется только сериализация
+        objects = list(queryset.order_by('id')[:rows])
+        assert light(objects, many=True).data == full(objects, many=True).data
+        full_time = timed(full, objects, repeat)
+        light_time = timed(light, objects, repeat)
+        results[name] = {
+            'rows': len(objects),
+            'full_us': round(full_time * 1e6, 1),
+            'light_us': round(light_time * 1e6, 1),
+            'speedup': round(full_time / light_time, 1),
+        }
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--settings', default=os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'api_yamdb.settings'
+    ))
+    parser.add_argument('--rows', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    os.environ['DJANGO_SETTINGS_MODULE'] = args.settings
+    sys.path.insert(0, os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__)
+    )))
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    from benchmarks.dataset import seed
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        seed(titles=args.rows, reviews=args.rows, comments=args.rows,
+             genres=5)
+        results = compare(args.rows, args.repeat)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
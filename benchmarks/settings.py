@@ -0,0 +1,16 @@
+""" Настройки серверов для benchmarks.concurrency на отдельной базе SQLite
+"""
+import os
+
+from api_yamdb.settings import *  # noqa
+from api_yamdb.settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('BENCH_DATABASE',
+                               os.path.join(BASE_DIR, 'bench.sqlite3')),
+    }
+}
+DATABASE_REPLICAS = []
+REQUEST_TIMING_SAMPLE_RATE = 0
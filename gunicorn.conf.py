@@ -0,0 +1,30 @@
+""" Настройки gunicorn из переменных окружения
+
+SERVER_MODE=wsgi (по умолчанию) запускает синхронные воркеры или gthread,
+SERVER_MODE=asgi - воркеры uvicorn, где соединения обслуживает цикл
+событий, а представления выполняются в пуле из ASGI_THREADS потоков.
+
+Число соединений с PostgreSQL на контейнер: workers * threads с постоянными
+соединениями (DB_CONN_MAX_AGE) или workers * DB_POOL_MAX_SIZE с пулом;
+в режиме asgi вместо threads считается ASGI_THREADS.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+# Один воркер, как до появления пула: число воркеров и постоянные
+# соединения включаются явно, после замеров на PostgreSQL
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 1))
+
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'api_yamdb.asgi:application'
+    # UvicornWorker требует uvloop и httptools, без них - UvicornH11Worker
+    default_worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'api_yamdb.wsgi:application'
+    default_worker_class = 'gthread' if threads > 1 else 'sync'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', default_worker_class)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+# Приложение загружается в каждом воркере после fork, поэтому
+# соединения и пулы не разделяются между процессами
+preload_app = False
@@ -2,9 +2,110 @@ import sys
 from os.path import abspath
 from os.path import dirname
 
+import pytest
+
 root_dir = dirname(dirname(abspath(__file__)))
 sys.path.append(root_dir)
 
 
 pytest_plugins = [
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from django.core.cache import cache
+
+    from api.authentication import user_cache
+
+    user_cache.clear()
+    cache.clear()
+    yield
+    user_cache.clear()
+    cache.clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        username='reader', email='reader@yamdb.fake', password='FOOBAR'
+    )
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create_user(
+        username='editor', email='editor@yamdb.fake', password='FOOBAR',
+        role='admin'
+    )
+
+
+@pytest.fixture
+def client():
+    from rest_framework.test import APIClient
+
+    return APIClient()
+
+
+@pytest.fixture
+def user_client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def admin_client(admin):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
+
+
+@pytest.fixture
+def replica(settings):
+    from api.models import Category
+
+    # Разные категории в основной базе и в реплике показывают, откуда
+    # пришло чтение
+    settings.DATABASE_REPLICAS = ['replica']
+    Category.objects.using('replica').create(name='Копия', slug='copy')
+    Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    from api.models import Category, Genre, Title
+
+    movie = Category.objects.create(name='Фильм', slug='movie')
+    drama = Genre.objects.create(name='Драма', slug='drama')
+    comedy = Genre.objects.create(name='Комедия', slug='comedy')
+    titles = []
+    for number in range(5):
+        title = Title.objects.create(
+            name=f'Произведение {number}', year=1990 + number,
+            description='Описание', category=movie
+        )
+        title.genre.set([drama, comedy] if number % 2 else [drama])
+        titles.append(title)
+    return titles
+
+
+@pytest.fixture
+def discussion(catalog, django_user_model):
+    from api.models import Comment, Review
+
+    title = catalog[0]
+    reviews = []
+    for number in range(5):
+        author = django_user_model.objects.create_user(
+            username=f'critic{number}'
+        )
+        review = Review.objects.create(title=title, author=author,
+                                       text='Отзыв', score=5)
+        Comment.objects.create(review=review, author=author, text='Ответ')
+        reviews.append(review)
+    return title, reviews
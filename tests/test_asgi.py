@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from django.core.signals import request_finished
+from django.http import StreamingHttpResponse
+
+from api.models import Category
+from api_yamdb.asgi import ThreadPoolASGIHandler
+
+
+async def request(handler, path, query=b'', messages=None):
+    messages = [] if messages is None else messages
+    body = [{'type': 'http.request', 'body': b''}]
+
+    async def receive():
+        return body.pop()
+
+    async def send(message):
+        messages.append(message)
+        # Клиент читает медленнее, чем поток отдает куски
+        await asyncio.sleep(0)
+
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'query_string': query,
+        'headers': [(b'host', b'localhost')], 'server': ('localhost', 80),
+    }
+    await handler(scope, receive, send)
+    return messages
+
+
+def call(handler, path, query=b''):
+    return asyncio.run(request(handler, path, query))
+
+
+# Представления выполняются в других потоках со своими соединениями
+@pytest.mark.django_db(transaction=True)
+class TestThreadPoolASGIHandler:
+
+    def test_response_is_sent(self):
+        Category.objects.create(name='Фильм', slug='movie')
+        handler = ThreadPoolASGIHandler(2)
+
+        start, body = call(handler, '/api/v1/categories/')
+
+        assert start['status'] == 200
+        assert json.loads(body['body'])['results'] == [
+            {'name': 'Фильм', 'slug': 'movie'}
+        ]
+
+    def test_views_run_in_pool_threads(self, monkeypatch):
+        handler = ThreadPoolASGIHandler(1)
+        get_response = handler.get_response
+        threads = []
+
+        def recording(request):
+            threads.append(threading.current_thread().name)
+            return get_response(request)
+
+        monkeypatch.setattr(handler, 'get_response', recording)
+        call(handler, '/api/v1/genres/')
+
+        assert threads and threads[0].startswith('asgi'), \
+            'Представление должно выполняться в пуле обработчика'
+
+    def test_streaming_response_is_sent_in_chunks(self, monkeypatch):
+        handler = ThreadPoolASGIHandler(1)
+        monkeypatch.setattr(handler, 'get_response', lambda request:
+                            StreamingHttpResponse(iter([b'a\n', b'b\n'])))
+
+        messages = call(handler, '/api/v1/export/titles/')
+
+        assert messages[0]['status'] == 200
+        assert [message.get('body') for message in messages[1:]] == [
+            b'a\n', b'b\n', None
+        ], 'Каждый кусок должен отправляться отдельным сообщением'
+
+    def test_stream_stays_on_one_thread(self, monkeypatch):
+        handler = ThreadPoolASGIHandler(4)
+        threads = {}
+        finished = []
+
+        def chunks(name):
+            for number in range(20):
+                threads.setdefault(name, set()).add(
+                    threading.current_thread().name
+                )
+                yield f'{number}\n'.encode()
+
+        def streaming(request):
+            return StreamingHttpResponse(chunks(request.path))
+
+        def on_finished(**kwargs):
+            finished.append(threading.current_thread().name)
+
+        monkeypatch.setattr(handler, 'get_response', streaming)
+        request_finished.connect(on_finished)
+        try:
+            async def both():
+                return await asyncio.gather(
+                    request(handler, '/first/'), request(handler, '/second/')
+                )
+            first, second = asyncio.run(both())
+        finally:
+            request_finished.disconnect(on_finished)
+
+        assert len(first) == len(second) == 22
+        assert [len(names) for names in threads.values()] == [1, 1], \
+            'Куски одного ответа должны читаться в одном потоке'
+        assert sorted(finished) == sorted(
+            names.pop() for names in threads.values()
+        ), 'Ответ закрывается в потоке, который его читал'
+
+    def test_disconnect_releases_thread(self, monkeypatch):
+        handler = ThreadPoolASGIHandler(1)
+        closed = []
+
+        def chunks():
+            try:
+                for _ in range(1000):
+                    yield b'x' * 100
+            finally:
+                closed.append(True)
+
+        monkeypatch.setattr(handler, 'get_response', lambda request:
+                            StreamingHttpResponse(chunks()))
+
+        async def disconnecting():
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if message.get('more_body'):
+                    raise OSError('Клиент отключился')
+
+            scope = {
+                'type': 'http', 'method': 'GET', 'path': '/',
+                'query_string': b'', 'headers': [],
+                'server': ('localhost', 80),
+            }
+            with pytest.raises(OSError):
+                await handler(scope, receive, send)
+            # Единственный поток пула должен освободиться
+            return await asyncio.wait_for(request(handler, '/'), 5)
+
+        messages = asyncio.run(disconnecting())
+
+        assert closed, 'Недочитанный ответ должен закрываться'
+        assert messages[0]['status'] == 200
@@ -0,0 +1,47 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+@pytest.fixture
+def token_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    return client
+
+
+@pytest.mark.django_db
+class TestCachedAuthentication:
+
+    def test_repeat_caller_costs_no_user_query(self, token_client,
+                                               django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = token_client.get('/api/v1/users/me/')
+        assert response.json()['username'] == 'reader'
+
+        with django_assert_num_queries(0):
+            response = token_client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+
+    def test_cache_is_invalidated_on_save(self, token_client, user,
+                                          django_assert_num_queries):
+        token_client.get('/api/v1/users/me/')
+        user.bio = 'Обновлено'
+        user.save()
+
+        with django_assert_num_queries(1):
+            response = token_client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'Обновлено', \
+            'После сохранения пользователь должен перечитываться из базы'
+
+    def test_me_patch_updates_user(self, token_client, user):
+        response = token_client.patch('/api/v1/users/me/',
+                                      {'first_name': 'Иван'})
+
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.first_name == 'Иван'
+        assert token_client.get('/api/v1/users/me/').json()['first_name'] \
+            == 'Иван'
@@ -0,0 +1,136 @@
+import pytest
+
+from api_yamdb.replicas import PIN_COOKIE
+
+
+def batch(client, *requests, **options):
+    return client.post('/api/v1/batch/',
+                       {'requests': list(requests), **options},
+                       format='json')
+
+
+@pytest.mark.django_db
+class TestBatch:
+
+    def test_title_page_in_one_call(self, user_client, discussion):
+        title, reviews = discussion
+
+        response = batch(
+            user_client,
+            {'path': f'/api/v1/titles/{title.id}/'},
+            {'path': f'/api/v1/titles/{title.id}/reviews/?fields=id,text'},
+            {'path': f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/'
+                     f'comments/'},
+            {'path': '/api/v1/users/me/'},
+        )
+
+        assert response.status_code == 200
+        results = response.json()
+        assert [result['status'] for result in results] == [200] * 4
+        assert results[0]['body']['name'] == title.name
+        assert len(results[1]['body']['results']) == 5
+        assert set(results[1]['body']['results'][0]) == {'id', 'text'}
+        assert results[2]['body']['results'][0]['text'] == 'Ответ'
+        assert results[3]['body']['username'] == 'reader', \
+            'Вложенные запросы выполняются от имени вызывающего'
+
+    def test_anonymous_caller(self, client, catalog):
+        response = batch(client, {'path': '/api/v1/users/me/'},
+                         {'path': '/api/v1/genres/'})
+
+        assert [result['status'] for result in response.json()] == [401, 200]
+
+    def test_writes_are_applied_in_order(self, user_client, catalog):
+        path = f'/api/v1/titles/{catalog[0].id}/reviews/'
+
+        response = batch(
+            user_client,
+            {'method': 'POST', 'path': path,
+             'body': {'text': 'Отлично', 'score': 9}},
+            {'path': path},
+            parallel=True,
+        )
+
+        created, listed = response.json()
+        assert created['status'] == 201
+        assert listed['body']['results'][0]['text'] == 'Отлично'
+
+    def test_item_errors(self, client):
+        response = batch(client, {'path': '/api/v1/nowhere/'},
+                         {'method': 'POST', 'path': '/api/v1/batch/',
+                          'body': {'requests': []}})
+
+        assert [result['status'] for result in response.json()] == [404, 400]
+
+    def test_invalid_batches(self, client, settings):
+        settings.BATCH_MAX_REQUESTS = 1
+
+        response = batch(client, {'path': '/admin/'})
+        assert response.status_code == 400, \
+            'Вызывать можно только адреса API'
+
+        response = batch(client, {'path': '/api/v1/genres/'},
+                         {'path': '/api/v1/categories/'})
+        assert response.status_code == 400
+
+        response = batch(client)
+        assert response.status_code == 400
+
+
+# Параллельные чтения выполняются в других потоках со своими соединениями
+@pytest.mark.django_db(transaction=True)
+class TestParallelBatch:
+
+    def test_parallel_reads_match_sequential(self, user_client, discussion):
+        title, reviews = discussion
+        requests = [
+            {'path': f'/api/v1/titles/{title.id}/'},
+            {'path': f'/api/v1/titles/{title.id}/reviews/'},
+            {'path': f'/api/v1/titles/{title.id}/stats/'},
+            {'path': '/api/v1/users/me/'},
+        ]
+
+        sequential = batch(user_client, *requests).json()
+        parallel = batch(user_client, *requests, parallel=True).json()
+
+        assert parallel == sequential
+        assert [result['status'] for result in parallel] == [200] * 4
+
+
+def slugs(result):
+    return [item['slug'] for item in result['body']['results']]
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestBatchReplicas:
+
+    def test_read_only_batch_uses_replica(self, user_client, replica):
+        response = batch(user_client, {'path': '/api/v1/categories/'},
+                         {'path': '/api/v1/categories/?search='},
+                         parallel=True)
+
+        assert [slugs(result) for result in response.json()] == [
+            ['copy'], ['copy']
+        ], 'Пакет из одних чтений и потоки пула должны читать из реплики'
+        assert PIN_COOKIE not in response.cookies
+
+    def test_batch_with_write_pins_primary(self, admin_client, replica):
+        response = batch(
+            admin_client,
+            {'method': 'POST', 'path': '/api/v1/categories/',
+             'body': {'name': 'Книга', 'slug': 'book'}},
+            {'path': '/api/v1/categories/'},
+            {'path': '/api/v1/categories/?search='},
+            parallel=True,
+        )
+
+        created, *listed = response.json()
+        assert created['status'] == 201
+        assert [sorted(slugs(result)) for result in listed] == [
+            ['book', 'movie'], ['book', 'movie']
+        ], 'После записи пакет должен читать из основной базы'
+        assert PIN_COOKIE in response.cookies
+
+        response = batch(admin_client, {'path': '/api/v1/categories/'})
+        assert sorted(slugs(response.json()[0])) == ['book', 'movie'], \
+            'Закрепленный клиент и в пакете читает из основной базы'
@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.dataset import seed
+from benchmarks.run import run_scenarios
+
+
+@pytest.mark.django_db
+class TestBenchmarks:
+
+    def test_benchmark_smoke(self):
+        dataset = seed(titles=10, reviews=30, comments=10, genres=3)
+        results = run_scenarios(requests=3, warmup=1)
+
+        assert dataset['users'] >= 3
+        assert set(results) == {
+            'title_list', 'title_detail', 'review_list', 'comment_list',
+            'review_create', 'token_obtain',
+        }
+        for name, result in results.items():
+            assert result['statuses'] in ([200], [201]), name
+            assert result['p50_ms'] <= result['p99_ms']
@@ -0,0 +1,179 @@
+import json
+
+import pytest
+
+from api.facets import refresh_facets
+from api.models import CatalogVersion, Category, FacetCount, Genre, Title
+
+
+def created(response):
+    return {item['index']: item for item in response.json()['results']}
+
+
+def failed(response):
+    return {item['index']: item['errors']
+            for item in response.json()['errors']}
+
+
+@pytest.mark.django_db
+class TestBulkCreate:
+
+    def test_titles_with_per_item_errors(self, admin_client, catalog):
+        response = admin_client.post('/api/v1/titles/bulk/', [
+            {'name': 'Новое', 'year': 2001, 'category': 'movie',
+             'genre': ['drama', 'comedy', 'drama']},
+            {'name': 'Без жанра', 'genre': ['western']},
+            {'year': 2002},
+            {'name': 'Без категории', 'genre': ['comedy']},
+        ], format='json')
+
+        assert response.status_code == 200
+        assert response.json()['count'] == 2
+        assert set(created(response)) == {0, 3}
+        errors = failed(response)
+        assert set(errors) == {1, 2}, \
+            'Ошибки элементов не должны прерывать запись остальных'
+        assert 'genre' in errors[1]
+        assert 'name' in errors[2]
+
+        title = Title.objects.get(pk=created(response)[0]['id'])
+        assert title.category.slug == 'movie'
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'comedy', 'drama'
+        ]
+
+    def test_slugs_are_resolved_in_batch(self, admin_client,
+                                         django_assert_max_num_queries):
+        Category.objects.create(name='Фильм', slug='movie')
+        items = [{'name': f'Категория {number}', 'slug': f'c{number}'}
+                 for number in range(50)]
+        items.append({'name': 'Повтор', 'slug': 'movie'})
+        items.append({'name': 'Повтор в пачке', 'slug': 'c1'})
+
+        # Не зависит от числа элементов
+        with django_assert_max_num_queries(10):
+            response = admin_client.post('/api/v1/categories/bulk/', items,
+                                         format='json')
+
+        assert response.json()['count'] == 50
+        assert failed(response) == {
+            50: {'slug': ['Значение уже занято.']},
+            51: {'slug': ['Значение уже занято.']},
+        }
+        assert Category.objects.count() == 51
+
+    def test_ndjson_body(self, admin_client):
+        body = '\n'.join(json.dumps({'name': name, 'slug': slug})
+                         for name, slug in (('Драма', 'drama'),
+                                            ('Комедия', 'comedy')))
+
+        response = admin_client.post('/api/v1/genres/bulk/', body + '\n',
+                                     content_type='application/x-ndjson')
+
+        assert response.json()['count'] == 2
+        assert Genre.objects.count() == 2
+
+    # Версии сдвигаются после фиксации транзакции
+    @pytest.mark.django_db(transaction=True)
+    def test_versions_are_bumped(self, admin_client):
+        admin_client.post('/api/v1/genres/bulk/',
+                          [{'name': 'Драма', 'slug': 'drama'}],
+                          format='json')
+
+        assert CatalogVersion.objects.get(name='genre').version > 0, \
+            'Массовая запись должна сбрасывать кэш каталога'
+
+    def test_limits_and_permissions(self, admin_client, user_client,
+                                    settings):
+        settings.BULK_MAX_ITEMS = 1
+        items = [{'name': 'Драма', 'slug': 'drama'},
+                 {'name': 'Комедия', 'slug': 'comedy'}]
+
+        response = user_client.post('/api/v1/genres/bulk/', items[:1],
+                                    format='json')
+        assert response.status_code == 403
+
+        response = admin_client.post('/api/v1/genres/bulk/', items,
+                                     format='json')
+        assert response.status_code == 400
+
+        response = admin_client.post('/api/v1/genres/bulk/', items[0],
+                                     format='json')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestBulkUpdateDelete:
+
+    def test_update_titles(self, admin_client, catalog):
+        response = admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': catalog[0].id, 'year': 1980, 'genre': ['comedy']},
+            {'id': catalog[1].id, 'category': None},
+            {'id': 100500, 'year': 1},
+            {'year': 1},
+        ], format='json')
+
+        assert response.json()['count'] == 2
+        assert set(failed(response)) == {2, 3}
+        first, second = Title.objects.filter(
+            pk__in=[catalog[0].id, catalog[1].id]
+        ).order_by('id')
+        assert first.year == 1980
+        assert first.name == 'Произведение 0', \
+            'Поля, которых нет в элементе, не меняются'
+        assert list(first.genre.values_list('slug', flat=True)) == [
+            'comedy'
+        ]
+        assert second.category is None
+        assert second.genre.count() == 2
+
+    def test_delete_by_key(self, admin_client, catalog):
+        response = admin_client.delete('/api/v1/genres/bulk/',
+                                       ['comedy', {'slug': 'western'}],
+                                       format='json')
+
+        assert response.json()['count'] == 1
+        assert failed(response) == {1: {'slug': ['Объект не найден.']}}
+        assert not Genre.objects.filter(slug='comedy').exists()
+
+        response = admin_client.delete(
+            '/api/v1/titles/bulk/', [title.id for title in catalog[:2]],
+            format='json'
+        )
+        assert response.json()['count'] == 2
+        assert Title.objects.count() == 3
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkFacets:
+
+    def test_facets_refreshed_after_bulk_write(self, admin_client, catalog):
+        admin_client.post('/api/v1/titles/bulk/', [
+            {'name': f'Новинка {number}', 'year': 2021, 'genre': ['comedy']}
+            for number in range(3)
+        ], format='json')
+
+        assert FacetCount.objects.get(facet='genre', key='comedy').count == 5
+        assert FacetCount.objects.get(facet='year', key='2020').count == 3
+
+    def test_facets_follow_bulk_update_and_delete(self, admin_client,
+                                                  catalog):
+        admin_client.patch('/api/v1/titles/bulk/', [
+            {'id': catalog[0].id, 'year': 2005, 'genre': ['comedy']},
+            {'id': catalog[1].id, 'category': None},
+        ], format='json')
+        admin_client.delete('/api/v1/titles/bulk/', [catalog[2].id],
+                            format='json')
+        admin_client.patch('/api/v1/categories/bulk/',
+                           [{'slug': 'movie', 'name': 'Кино'}],
+                           format='json')
+        incremental = set(FacetCount.objects.filter(count__gt=0).values_list(
+            'facet', 'key', 'label', 'count'
+        ))
+
+        refresh_facets()
+
+        assert incremental == set(FacetCount.objects.values_list(
+            'facet', 'key', 'label', 'count'
+        )), 'Массовая запись должна сдвигать счетчики как полный пересчет'
+        assert ('category', 'movie', 'Кино', 3) in incremental
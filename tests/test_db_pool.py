@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from api_yamdb.db_pool.pool import ConnectionPool, PoolTimeout
+
+
+def connect():
+    return sqlite3.connect(':memory:', check_same_thread=False)
+
+
+def is_usable(connection):
+    try:
+        connection.execute('SELECT 1')
+    except sqlite3.ProgrammingError:
+        return False
+    return True
+
+
+class TestConnectionPool:
+
+    def test_connection_is_reused(self):
+        pool = ConnectionPool(connect)
+
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+
+        assert second is first
+        assert pool.stats()['created'] == 1
+        assert pool.stats()['in_use'] == 1
+
+    def test_max_size_and_timeout(self):
+        pool = ConnectionPool(connect, max_size=1, timeout=0.05)
+        pool.acquire()
+
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+
+        stats = pool.stats()
+        assert stats['size'] == 1 and stats['timeouts'] == 1
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(connect, max_size=1, timeout=2)
+        held = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, args=(held,))
+        timer.start()
+
+        connection = pool.acquire()
+        timer.join()
+
+        assert connection is held
+        stats = pool.stats()
+        assert stats['waits'] == 1 and stats['wait_ms_max'] >= 40
+
+    def test_stale_connection_is_replaced(self):
+        pool = ConnectionPool(connect, is_usable=is_usable, check_after=0)
+        broken = pool.acquire()
+        pool.release(broken)
+        broken.close()
+
+        connection = pool.acquire()
+
+        assert connection is not broken and is_usable(connection)
+        assert pool.stats()['closed'] == 1
+        assert pool.stats()['size'] == 1
+
+    def test_fresh_connection_skips_check(self):
+        checks = []
+        pool = ConnectionPool(connect, is_usable=checks.append,
+                              check_after=60)
+        pool.release(pool.acquire())
+        pool.acquire()
+
+        assert checks == [], 'Недавно возвращенное соединение не проверяется'
+
+    def test_expired_connection_is_closed(self):
+        pool = ConnectionPool(connect, max_lifetime=0.01)
+        connection = pool.acquire()
+        time.sleep(0.02)
+
+        pool.release(connection)
+
+        assert pool.stats()['idle'] == 0 and pool.stats()['closed'] == 1
+
+    def test_failed_reset_discards_connection(self):
+        def reset(connection):
+            raise sqlite3.OperationalError('broken')
+
+        pool = ConnectionPool(connect, reset=reset)
+        pool.release(pool.acquire())
+
+        assert pool.stats()['size'] == 0 and pool.stats()['closed'] == 1
+
+    def test_failed_connect_frees_slot(self):
+        def refuse():
+            raise sqlite3.OperationalError('refused')
+
+        pool = ConnectionPool(refuse, max_size=1)
+
+        with pytest.raises(sqlite3.OperationalError):
+            pool.acquire()
+        assert pool.stats()['size'] == 0
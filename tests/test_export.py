@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import Comment, Review
+
+
+def read_ndjson(response):
+    return [json.loads(line)
+            for line in b''.join(response.streaming_content).splitlines()]
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_titles_ndjson(self, admin_client, admin, catalog):
+        Review.objects.create(title=catalog[1], author=admin, text='Отзыв',
+                              score=6)
+
+        response = admin_client.get('/api/v1/export/titles/')
+
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        rows = read_ndjson(response)
+        assert len(rows) == 5
+        assert rows[1] == {
+            'id': catalog[1].id, 'name': 'Произведение 1', 'year': 1991,
+            'rating': 6, 'description': 'Описание',
+            'genre': [{'name': 'Драма', 'slug': 'drama'},
+                      {'name': 'Комедия', 'slug': 'comedy'}],
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+        }
+
+    def test_reviews_csv(self, admin_client, discussion):
+        response = admin_client.get('/api/v1/export/reviews/?format=csv')
+
+        assert response['Content-Type'].startswith('text/csv')
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert [row['kind'] for row in rows] == ['review', 'comment'] * 5
+        assert rows[1]['review'] == rows[0]['id']
+
+    def test_reviews_since(self, admin_client, discussion):
+        _, reviews = discussion
+        old = timezone.now() - timezone.timedelta(days=30)
+        Review.objects.filter(pk__in=[review.pk for review in reviews[1:]]) \
+            .update(pub_date=old)
+        Comment.objects.filter(review__in=reviews[2:]).update(pub_date=old)
+        since = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+
+        response = admin_client.get('/api/v1/export/reviews/',
+                                    {'since': since})
+
+        assert [row['id'] for row in read_ndjson(response)] == [
+            reviews[1].id, reviews[0].id
+        ], 'Нужны отзывы, опубликованные или прокомментированные после since'
+
+    def test_titles_reject_since(self, admin_client, catalog):
+        response = admin_client.get('/api/v1/export/titles/?since=2020-01-01')
+
+        assert response.status_code == 400
+
+    def test_read_only_like_public_lists(self, client, user_client,
+                                         catalog):
+        assert client.get('/api/v1/export/titles/').status_code == 200, \
+            'Выгрузка доступна тем же, кто читает публичные списки'
+        assert user_client.post('/api/v1/export/titles/').status_code == 403
+
+    def test_command(self, discussion, tmp_path):
+        output = tmp_path / 'reviews.ndjson'
+
+        call_command('export', 'reviews', '--output', str(output),
+                     '--chunk-size', '2')
+
+        rows = [json.loads(line) for line in output.read_text().splitlines()]
+        assert len(rows) == 5
+        assert all(len(row['comments']) == 1 for row in rows)
@@ -0,0 +1,118 @@
+import pytest
+from django.db import transaction
+
+from api.facets import refresh_facets
+from api.models import Category, FacetCount, Genre, Title
+
+CATALOG_FACETS = {
+    'genre': [
+        {'slug': 'drama', 'name': 'Драма', 'count': 5},
+        {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+    ],
+    'category': [{'slug': 'movie', 'name': 'Фильм', 'count': 5}],
+    'year': [{'from': 1990, 'to': 1999, 'count': 5}],
+}
+
+
+def summary():
+    return {(facet, key): count for facet, key, count in
+            FacetCount.objects.values_list('facet', 'key', 'count')
+            if count}
+
+
+@pytest.mark.django_db
+class TestTitleFacets:
+
+    def test_unfiltered_facets_come_from_summary(
+            self, client, catalog, django_assert_num_queries):
+        # Версии таблиц для ETag и строки сводной таблицы
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/facets/')
+
+        assert response.status_code == 200
+        assert response.json() == CATALOG_FACETS
+
+    def test_filtered_facets_in_one_query(self, client, catalog,
+                                          django_assert_num_queries):
+        Title.objects.create(name='Старое кино', year=1975)
+
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/facets/?genre=comedy')
+
+        assert response.json() == {
+            'genre': [
+                {'slug': 'comedy', 'name': 'Комедия', 'count': 2},
+                {'slug': 'drama', 'name': 'Драма', 'count': 2},
+            ],
+            'category': [{'slug': 'movie', 'name': 'Фильм', 'count': 2}],
+            'year': [{'from': 1990, 'to': 1999, 'count': 2}],
+        }
+
+    def test_summary_follows_catalog_changes(self, client, catalog):
+        catalog[0].delete()
+        catalog[1].genre.remove(Genre.objects.get(slug='comedy'))
+        movie = Category.objects.get(slug='movie')
+        movie.name = 'Кино'
+        movie.save()
+        Title.objects.create(name='Старое кино', year=1975,
+                             category=Category.objects.get(slug='movie'))
+
+        response = client.get('/api/v1/titles/facets/')
+
+        assert response.json() == {
+            'genre': [
+                {'slug': 'drama', 'name': 'Драма', 'count': 4},
+                {'slug': 'comedy', 'name': 'Комедия', 'count': 1},
+            ],
+            'category': [{'slug': 'movie', 'name': 'Кино', 'count': 5}],
+            'year': [
+                {'from': 1970, 'to': 1979, 'count': 1},
+                {'from': 1990, 'to': 1999, 'count': 4},
+            ],
+        }
+
+    def test_write_touches_only_its_keys(self, catalog,
+                                         django_assert_max_num_queries):
+        drama = Genre.objects.get(slug='drama')
+
+        # Не зависит от числа произведений в каталоге
+        with django_assert_max_num_queries(12):
+            title = Title.objects.create(name='Новинка', year=2020)
+            title.genre.add(drama)
+
+        title.year = 1995
+        title.category = Category.objects.get(slug='movie')
+        with django_assert_max_num_queries(8):
+            title.save()
+
+        assert FacetCount.objects.get(facet='year', key='2020').count == 0
+        assert FacetCount.objects.get(facet='year', key='1990').count == 6
+        assert FacetCount.objects.get(facet='category', key='movie').count \
+            == 6
+        assert FacetCount.objects.get(facet='genre', key='drama').count == 6
+
+    def test_summary_matches_rebuild(self, catalog):
+        comedy = Genre.objects.get(slug='comedy')
+        comedy.slug = 'funny'
+        comedy.save()
+        comedy.title_set.remove(catalog[1])
+        catalog[2].genre.set([comedy])
+        catalog[3].genre.clear()
+        Category.objects.get(slug='movie').delete()
+        Genre.objects.get(slug='drama').delete()
+        Title.objects.filter(pk=catalog[4].pk).delete()
+        incremental = summary()
+
+        refresh_facets()
+
+        assert incremental == summary(), \
+            'Сдвиги счетчиков должны совпадать с полным пересчетом'
+        assert incremental == {('genre', 'funny'): 1, ('year', '1990'): 4}
+
+    def test_rolled_back_changes_keep_summary(self, catalog):
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Title.objects.all().delete()
+                raise RuntimeError
+
+        assert FacetCount.objects.get(facet='genre', key='drama').count == 5
@@ -0,0 +1,93 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def select_sql(queries, table):
+    return [query['sql'] for query in queries
+            if query['sql'].startswith('SELECT') and
+            f'FROM "{table}"' in query['sql']]
+
+
+@pytest.mark.django_db
+class TestSparseFields:
+
+    def test_title_list_skips_relations(self, client, catalog,
+                                        django_assert_num_queries):
+        # Версии таблиц, COUNT и произведения без запроса жанров
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+
+        assert response.status_code == 200
+        assert response.json()['results'][0] == {
+            'id': catalog[0].id, 'name': 'Произведение 0', 'rating': None,
+        }
+
+    def test_title_list_defers_columns(self, client, catalog):
+        with CaptureQueriesContext(connection) as queries:
+            client.get('/api/v1/titles/?fields=name,category')
+
+        sql = select_sql(queries, 'api_title')[-1]
+        assert '"api_title"."description"' not in sql, \
+            'Незапрошенные столбцы не должны выбираться'
+        assert 'JOIN "api_category"' in sql
+
+    def test_title_detail(self, client, catalog):
+        response = client.get(f'/api/v1/titles/{catalog[1].id}/'
+                              f'?fields=genre')
+
+        assert response.json() == {
+            'genre': [{'name': 'Драма', 'slug': 'drama'},
+                      {'name': 'Комедия', 'slug': 'comedy'}],
+        }
+
+    def test_unknown_field(self, client, catalog):
+        response = client.get('/api/v1/titles/?fields=name,secret')
+
+        assert response.status_code == 400
+        assert 'secret' in response.json()['fields']
+
+    def test_review_list(self, client, discussion):
+        title, _ = discussion
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/'
+                                  f'?fields=id,score')
+
+        assert set(response.json()['results'][0]) == {'id', 'score'}
+        sql = select_sql(queries, 'api_review')[-1]
+        assert 'JOIN' not in sql and '"api_review"."text"' not in sql
+
+    def test_review_cursor_page(self, client, discussion,
+                                django_assert_num_queries):
+        title, _ = discussion
+        url = (f'/api/v1/titles/{title.id}/reviews/'
+               f'?pagination=cursor&fields=score')
+
+        # Одна страница без догрузки pub_date и проверки произведения
+        with django_assert_num_queries(1):
+            response = client.get(url)
+
+        assert [set(item) for item in response.json()['results']] == \
+            [{'score'}] * 5
+
+    def test_comment_list(self, client, discussion):
+        title, reviews = discussion
+
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/'
+            f'?fields=author,text'
+        )
+
+        assert response.json()['results'] == [
+            {'author': 'critic0', 'text': 'Ответ'}
+        ]
+
+    def test_fields_ignored_on_create(self, user_client, catalog):
+        response = user_client.post(
+            f'/api/v1/titles/{catalog[0].id}/reviews/?fields=id',
+            {'text': 'Отзыв', 'score': 5}
+        )
+
+        assert response.status_code == 201
+        assert response.json()['text'] == 'Отзыв'
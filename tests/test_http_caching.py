@@ -0,0 +1,58 @@
+import pytest
+
+from api.models import Category, Review
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+
+    def test_not_modified_skips_serialization(self, client, catalog,
+                                              django_assert_num_queries):
+        response = client.get('/api/v1/titles/')
+        etag = response['ETag']
+        assert 'public' in response['Cache-Control']
+        # Рейтинг меняется без сдвига версий таблиц, поэтому у
+        # произведений только ETag
+        assert 'Last-Modified' not in response
+        assert 'Last-Modified' in client.get('/api/v1/categories/')
+
+        with django_assert_num_queries(1):
+            response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['ETag'] == etag
+
+    # Версии сдвигаются после фиксации транзакции
+    @pytest.mark.django_db(transaction=True)
+    def test_etag_changes_on_write(self, client, catalog, user):
+        title_url = f'/api/v1/titles/{catalog[0].id}/'
+        title_etag = client.get(title_url)['ETag']
+        category_etag = client.get('/api/v1/categories/')['ETag']
+
+        Review.objects.create(title=catalog[0], author=user, text='a',
+                              score=7)
+        response = client.get(title_url, HTTP_IF_NONE_MATCH=title_etag)
+        assert response.status_code == 200, \
+            'Новый отзыв меняет рейтинг и должен менять ETag произведения'
+        assert response.json()['rating'] == 7
+
+        assert client.get(
+            '/api/v1/categories/', HTTP_IF_NONE_MATCH=category_etag
+        ).status_code == 304, 'Отзывы не должны сбрасывать ETag категорий'
+        other_url = f'/api/v1/titles/{catalog[1].id}/'
+        other_etag = client.get(other_url)['ETag']
+        Review.objects.create(title=catalog[2], author=user, text='a',
+                              score=7)
+        assert client.get(
+            other_url, HTTP_IF_NONE_MATCH=other_etag
+        ).status_code == 304, 'Отзыв не должен менять ETag других произведений'
+
+        Category.objects.create(name='Книга', slug='book')
+        assert client.get(
+            '/api/v1/categories/', HTTP_IF_NONE_MATCH=category_etag
+        ).status_code == 200
+
+    def test_etag_depends_on_query(self, client, catalog):
+        first = client.get('/api/v1/titles/?year=1990')['ETag']
+        second = client.get('/api/v1/titles/?year=1991')['ETag']
+
+        assert first != second
@@ -0,0 +1,72 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+from api.models import Comment, Review, Title, User
+
+
+def count_rows(filename):
+    path = os.path.join(settings.BASE_DIR, 'data', filename)
+    with open(path, encoding='utf-8') as csv_file:
+        return sum(1 for _ in csv.DictReader(csv_file))
+
+
+def read_rows(filename):
+    path = os.path.join(settings.BASE_DIR, 'data', filename)
+    with open(path, encoding='utf-8') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def review_pairs():
+    return {(row['title_id'], row['author'])
+            for row in read_rows('review.csv')}
+
+
+def kept_review_ids():
+    # Из повторных отзывов остается первый по порядку в файле
+    first = {}
+    for row in read_rows('review.csv'):
+        first.setdefault((row['title_id'], row['author']), row['id'])
+    return set(first.values())
+
+
+def kept_comments():
+    reviews = kept_review_ids()
+    return sum(1 for row in read_rows('comments.csv')
+               if row['review_id'] in reviews)
+
+
+@pytest.mark.django_db
+class TestLoadCsv:
+
+    def test_load_csv(self):
+        out = StringIO()
+        call_command('load_csv', '--batch-size', '7', stdout=out)
+
+        assert User.objects.count() == count_rows('users.csv')
+        assert Title.objects.count() == count_rows('titles.csv')
+        assert Title.genre.through.objects.count() == \
+            count_rows('genre_title.csv')
+        assert Review.objects.count() == len(review_pairs()), \
+            'Повторные отзывы автора на произведение должны пропускаться'
+        assert set(map(str, Review.objects.values_list('id', flat=True))) \
+            == kept_review_ids()
+        assert Comment.objects.count() == kept_comments(), \
+            'Комментарии к пропущенным отзывам не загружаются'
+        assert 'строк/с' in out.getvalue(), \
+            'Команда должна сообщать скорость загрузки'
+
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, \
+            'Дата публикации должна браться из файла'
+        title = Title.objects.get(pk=review.title_id)
+        assert title.rating_count == title.reviews.count(), \
+            'После загрузки рейтинги должны быть пересчитаны'
+
+        new_title = Title.objects.create(name='Новое произведение')
+        assert new_title.id > review.title_id, \
+            'Последовательности ключей должны быть сдвинуты после загрузки'
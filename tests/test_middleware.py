@@ -0,0 +1,45 @@
+import json
+import logging
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestRequestTimingMiddleware:
+
+    def test_server_timing_and_log(self, admin_client, catalog, caplog,
+                                   settings):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1
+
+        with caplog.at_level(logging.INFO, logger='api_yamdb.timing'):
+            response = admin_client.get('/api/v1/titles/')
+
+        timing = response['Server-Timing']
+        assert 'db;dur=' in timing and 'desc="4 queries"' in timing
+        assert 'serialize;dur=' in timing
+        assert 'render;dur=' in timing and 'total;dur=' in timing
+        record = json.loads(caplog.records[-1].getMessage())
+        assert record['view'] == 'titles-list'
+        assert record['queries'] == 4
+        assert record['status'] == 200
+        assert record['serialize_ms'] > 0, \
+            'Время сериализатора считается отдельно от рендеринга'
+
+    def test_header_is_hidden_from_clients(self, client, catalog, caplog,
+                                           settings):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 1
+
+        with caplog.at_level(logging.INFO, logger='api_yamdb.timing'):
+            response = client.get('/api/v1/titles/')
+
+        assert 'Server-Timing' not in response, \
+            'Метрики отдаются только администраторам'
+        assert json.loads(caplog.records[-1].getMessage())['queries'] == 4
+
+    def test_unsampled_requests_are_untouched(self, settings, catalog):
+        settings.REQUEST_TIMING_SAMPLE_RATE = 0
+
+        response = APIClient().get('/api/v1/titles/')
+
+        assert 'Server-Timing' not in response
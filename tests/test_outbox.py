@@ -0,0 +1,67 @@
+import os
+from io import StringIO
+
+import pytest
+from django.core.mail.backends.filebased import EmailBackend
+from django.core.management import call_command
+
+from api.models import OutgoingEmail
+from api.outbox import send_pending
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_queues_email(self, client, settings, tmp_path):
+        settings.EMAIL_BACKEND = \
+            'django.core.mail.backends.filebased.EmailBackend'
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+
+        response = client.post('/api/v1/auth/email/',
+                               {'email': 'new@yamdb.fake'})
+
+        assert response.status_code == 201
+        assert not os.listdir(tmp_path), \
+            'Письмо не должно отправляться во время запроса'
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == 'new@yamdb.fake'
+
+        call_command('send_emails', stdout=StringIO())
+
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT
+        sent = os.listdir(tmp_path)
+        assert len(sent) == 1, 'Пачка отправляется через одно соединение'
+        with open(tmp_path / sent[0]) as message:
+            assert 'confirmation_code' in message.read()
+
+    def test_failed_send_is_retried_with_backoff(self, settings, tmp_path,
+                                                 monkeypatch):
+        settings.EMAIL_BACKEND = \
+            'django.core.mail.backends.filebased.EmailBackend'
+        settings.EMAIL_FILE_PATH = str(tmp_path)
+        email = OutgoingEmail.objects.create(
+            subject='s', message='m', from_email='a@yamdb.fake',
+            recipient='b@yamdb.fake'
+        )
+
+        def fail(self, messages):
+            raise ConnectionError('smtp is down')
+
+        monkeypatch.setattr(EmailBackend, 'send_messages', fail)
+        stats = send_pending(max_attempts=2, backoff=30)
+
+        email.refresh_from_db()
+        assert stats['retried'] == 1
+        assert email.status == OutgoingEmail.PENDING
+        assert email.last_error == 'smtp is down'
+        assert (email.next_attempt_at - email.created).total_seconds() >= 30
+        assert send_pending()['retried'] == 0, \
+            'Письмо не должно отправляться раньше следующей попытки'
+
+        OutgoingEmail.objects.update(next_attempt_at=email.created)
+        stats = send_pending(max_attempts=2)
+
+        email.refresh_from_db()
+        assert stats['failed'] == 1
+        assert email.status == OutgoingEmail.FAILED
@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Review
+from api.pagination import PubDateCursorPagination
+
+
+@pytest.mark.django_db
+class TestFeedPagination:
+
+    def test_cursor_mode_walks_reviews(self, client, catalog,
+                                       django_user_model, monkeypatch):
+        monkeypatch.setattr(PubDateCursorPagination, 'page_size', 2)
+        title = catalog[0]
+        for number in range(5):
+            author = django_user_model.objects.create_user(
+                username=f'author{number}'
+            )
+            Review.objects.create(title=title, author=author, text='t',
+                                  score=5)
+        expected = list(
+            title.reviews.order_by('-pub_date', '-id').values_list(
+                'id', flat=True
+            )
+        )
+
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        received = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = client.get(url).json()
+                assert 'count' not in data, \
+                    'Курсорный режим не должен считать общее количество'
+                received.extend(item['id'] for item in data['results'])
+                url = data['next']
+
+        assert received == expected, \
+            'Курсор должен отдавать все отзывы в стабильном порядке'
+        assert not any('COUNT(' in query['sql'] for query in queries), \
+            'Курсорный режим не должен выполнять COUNT(*)'
+
+    def test_page_mode_is_default(self, client, catalog):
+        response = client.get(f'/api/v1/titles/{catalog[0].id}/reviews/')
+
+        assert response.json()['count'] == 0
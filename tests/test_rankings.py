@@ -0,0 +1,153 @@
+from datetime import timedelta
+
+import pytest
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from api.models import Review, Title, TitleRanking
+from api import rankings
+from api.rankings import create_rankings, refresh_rankings
+
+
+@pytest.fixture
+def scored(catalog, django_user_model, settings):
+    settings.RANKING_MIN_REVIEWS = 2
+    critics = [
+        django_user_model.objects.create_user(username=f'critic{number}')
+        for number in range(3)
+    ]
+    # Средняя по каталогу 9.5: у первого 9.75, у второго 9.2,
+    # у третьего один отзыв - меньше порога
+    for title, scores in zip(catalog, ([10, 10], [9, 9, 9], [10])):
+        for author, score in zip(critics, scores):
+            Review.objects.create(title=title, author=author, text='Отзыв',
+                                  score=score)
+    return catalog
+
+
+def names(response):
+    return [title['name'] for title in response.json()]
+
+
+@pytest.mark.django_db
+class TestTopRated:
+
+    def test_bayesian_order_with_threshold(self, client, scored,
+                                           django_assert_num_queries):
+        refresh_rankings()
+
+        # Версии таблиц, произведения с рейтингом и их жанры
+        with django_assert_num_queries(3):
+            response = client.get('/api/v1/titles/top/')
+
+        assert response.status_code == 200
+        assert names(response) == ['Произведение 0', 'Произведение 1'], \
+            'Произведения с малым числом отзывов не попадают в лучшие'
+        assert [title['score'] for title in response.json()] == [9.75, 9.2]
+        assert response.json()[0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'}
+        ]
+
+    def test_filters_and_limit(self, client, scored):
+        refresh_rankings()
+
+        response = client.get('/api/v1/titles/top/?genre=comedy')
+        assert names(response) == ['Произведение 1']
+
+        response = client.get('/api/v1/titles/top/?limit=1')
+        assert names(response) == ['Произведение 0']
+
+        response = client.get('/api/v1/titles/top/?limit=1000')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestTrending:
+
+    def test_only_recent_reviews_count(self, client, scored):
+        Review.objects.filter(title=scored[1]).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        refresh_rankings()
+
+        response = client.get('/api/v1/titles/trending/')
+
+        assert names(response) == ['Произведение 0', 'Произведение 2']
+        assert [title['recent_reviews'] for title in response.json()] == \
+            [2, 1]
+
+
+# Частичный пересчет выполняется после фиксации транзакции
+@pytest.mark.django_db(transaction=True)
+class TestRankingRefresh:
+
+    def test_review_refreshes_its_title(self, user_client, scored):
+        refresh_rankings()
+
+        response = user_client.post(
+            f'/api/v1/titles/{scored[2].id}/reviews/',
+            {'text': 'Шедевр', 'score': 10}
+        )
+
+        assert response.status_code == 201
+        ranking = TitleRanking.objects.get(title=scored[2])
+        assert ranking.score == pytest.approx(9.75)
+        assert ranking.recent_reviews == 2
+
+    def test_one_refresh_per_transaction(self, scored, django_user_model):
+        author = django_user_model.objects.create_user(username='late')
+        with transaction.atomic():
+            for title in scored[3:]:
+                Review.objects.create(title=title, author=author,
+                                      text='Отзыв', score=5)
+            scheduled = [func for _, func in connection.run_on_commit
+                         if getattr(func, 'func', None) is refresh_rankings]
+
+            assert len(scheduled) == 1
+            assert scheduled[0].args[0] == {
+                title.id for title in scored[3:]
+            }
+
+        assert TitleRanking.objects.filter(
+            title__in=scored[3:], recent_reviews=1
+        ).count() == 2
+
+    def test_ranking_error_is_not_duplicate_review(self, user_client, scored,
+                                                   monkeypatch):
+        def broken(title_ids=None):
+            raise IntegrityError('ranking')
+
+        monkeypatch.setattr(rankings, 'refresh_rankings', broken)
+
+        # Сбой пересчета не выдается за повторный отзыв
+        with pytest.raises(IntegrityError):
+            user_client.post(f'/api/v1/titles/{scored[3].id}/reviews/',
+                             {'text': 'Отзыв', 'score': 7})
+        assert Review.objects.filter(title=scored[3]).exists()
+
+
+@pytest.mark.django_db
+class TestRankingUpsert:
+
+    def test_rows_are_updated_in_place(self, scored):
+        refresh_rankings()
+        stale = TitleRanking.objects.create(title=scored[4], recent_reviews=3)
+        Title.objects.filter(pk=scored[0].pk).update(rating_sum=2)
+
+        assert refresh_rankings([scored[0].id, scored[4].id]) == 1
+        assert not TitleRanking.objects.filter(pk=stale.pk).exists()
+        assert TitleRanking.objects.get(
+            title=scored[0]
+        ).score < TitleRanking.objects.get(title=scored[1]).score
+
+    def test_create_updates_concurrent_row(self, scored):
+        TitleRanking.objects.create(title=scored[3], recent_reviews=1)
+
+        create_rankings([
+            TitleRanking(title_id=scored[3].id, score=5, recent_reviews=2),
+            TitleRanking(title_id=scored[4].id, recent_reviews=1),
+        ])
+
+        assert TitleRanking.objects.get(title=scored[3]).score == 5
+        assert TitleRanking.objects.get(title=scored[3]).recent_reviews == 2
+        assert TitleRanking.objects.filter(title=scored[4]).exists()
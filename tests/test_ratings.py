@@ -0,0 +1,177 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Review, Title, TitleScores
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_review_writes(self, catalog, user, admin):
+        title = catalog[0]
+        review = Review.objects.create(title=title, author=user, text='a',
+                                       score=10)
+        Review.objects.create(title=title, author=admin, text='b', score=5)
+        title.refresh_from_db()
+        assert title.rating == 7, 'Рейтинг должен учитывать новые отзывы'
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 1
+        review.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (6, 2), \
+            'Изменение оценки должно пересчитывать рейтинг'
+
+        review.delete()
+        title.refresh_from_db()
+        assert title.rating == 5, \
+            'Удаление отзыва должно пересчитывать рейтинг'
+
+        user.delete()
+        admin.delete()
+        title.refresh_from_db()
+        assert title.rating is None, \
+            'Каскадное удаление отзывов должно обнулять рейтинг'
+
+    def test_stale_instances_do_not_drift(self, catalog, user):
+        title = catalog[0]
+        review = Review.objects.create(title=title, author=user, text='a',
+                                       score=10)
+        first = Review.objects.get(pk=review.pk)
+        second = Review.objects.get(pk=review.pk)
+
+        # Оба экземпляра загружены до правок, как в параллельных PATCH
+        first.score = 4
+        first.save()
+        second.score = 6
+        second.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (6, 1), \
+            'Разница должна считаться от оценки, сохраненной в базе'
+
+        first.delete()
+        second.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (0, 0), \
+            'Повторное удаление не должно вычитать отзыв еще раз'
+
+    def test_recalculate_ratings_command(self, catalog, user):
+        title = catalog[0]
+        Review.objects.create(title=title, author=user, text='a', score=8)
+        Title.objects.update(rating_sum=0, rating_count=0)
+
+        call_command('recalculate_ratings', stdout=StringIO())
+
+        title.refresh_from_db()
+        assert title.rating == 8, 'Команда должна восстанавливать рейтинг'
+
+    def test_rating_is_read_without_queries(self, client, catalog, user,
+                                            django_assert_num_queries):
+        Review.objects.create(title=catalog[0], author=user, text='a',
+                              score=9)
+        title = Title.objects.get(pk=catalog[0].pk)
+
+        with django_assert_num_queries(0):
+            assert title.rating == 9
+
+        response = client.get(f'/api/v1/titles/{catalog[0].id}/')
+        assert response.json()['rating'] == 9, \
+            'Рейтинг в ответе должен браться из сохраненных полей'
+
+
+def histogram(**counts):
+    return {str(score): counts.get(f's{score}', 0) for score in range(1, 11)}
+
+
+@pytest.mark.django_db
+class TestTitleScoreStats:
+
+    def test_histogram_follows_review_writes(self, catalog, user, admin):
+        first, second = catalog[:2]
+        review = Review.objects.create(title=first, author=user, text='a',
+                                       score=10)
+        Review.objects.create(title=first, author=admin, text='b', score=4)
+        assert TitleScores.objects.get(title=first).counts == \
+            [0, 0, 0, 1, 0, 0, 0, 0, 0, 1]
+
+        review = Review.objects.get(pk=review.pk)
+        review.score = 4
+        review.save()
+        assert TitleScores.objects.get(title=first).score_4 == 2, \
+            'Изменение оценки должно переносить отзыв в другой столбец'
+
+        review.title = second
+        review.save()
+        assert TitleScores.objects.get(title=first).counts[3] == 1
+        assert TitleScores.objects.get(title=second).counts[3] == 1
+
+        review.delete()
+        assert sum(TitleScores.objects.get(title=second).counts) == 0
+
+    def test_stale_instances_keep_histogram(self, catalog, user):
+        title = catalog[0]
+        review = Review.objects.create(title=title, author=user, text='a',
+                                       score=10)
+        first = Review.objects.get(pk=review.pk)
+        second = Review.objects.get(pk=review.pk)
+
+        first.score = 4
+        first.save()
+        second.score = 6
+        second.save()
+        assert TitleScores.objects.get(title=title).counts == \
+            [0, 0, 0, 0, 0, 1, 0, 0, 0, 0], \
+            'Прежняя оценка должна браться из заблокированной строки'
+
+        first.delete()
+        second.delete()
+        assert TitleScores.objects.get(title=title).counts == [0] * 10, \
+            'Повторное удаление не должно уводить счетчик ниже нуля'
+
+    # Версии сдвигаются после фиксации транзакции
+    @pytest.mark.django_db(transaction=True)
+    def test_stats_endpoint(self, client, catalog, user, admin,
+                            django_user_model, django_assert_num_queries):
+        critic = django_user_model.objects.create_user(username='critic')
+        for author, score in ((user, 9), (admin, 6), (critic, 9)):
+            Review.objects.create(title=catalog[0], author=author,
+                                  text='Отзыв', score=score)
+
+        # Версии таблиц для ETag и строка гистограммы
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{catalog[0].id}/stats/')
+
+        assert response.status_code == 200
+        assert response.json() == {
+            'count': 3, 'mean': 8.0, 'median': 9.0,
+            'histogram': histogram(s6=1, s9=2),
+        }
+
+        critic.delete()
+        response = client.get(f'/api/v1/titles/{catalog[0].id}/stats/')
+        assert response.json()['median'] == 7.5, \
+            'Медиана четного числа оценок - среднее двух средних'
+
+    def test_stats_without_reviews(self, client, catalog):
+        response = client.get(f'/api/v1/titles/{catalog[0].id}/stats/')
+        assert response.json() == {
+            'count': 0, 'mean': None, 'median': None,
+            'histogram': histogram(),
+        }
+
+        response = client.get('/api/v1/titles/100500/stats/')
+        assert response.status_code == 404
+
+    def test_recalculate_restores_histograms(self, catalog, user, admin):
+        Review.objects.create(title=catalog[0], author=user, text='a',
+                              score=3)
+        Review.objects.create(title=catalog[1], author=admin, text='b',
+                              score=7)
+        TitleScores.objects.all().delete()
+
+        call_command('recalculate_ratings', stdout=StringIO())
+
+        assert TitleScores.objects.get(title=catalog[0]).score_3 == 1
+        assert TitleScores.objects.get(title=catalog[1]).score_7 == 1
@@ -0,0 +1,59 @@
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+
+SAMPLE = {
+    'id': 1,
+    'name': 'Побег из Шоушенка\u2028\u2029"кавычки"',
+    'rating': None,
+    'score': Decimal('7.5'),
+    'ratio': 0.1,
+    'pub_date': datetime.datetime(2020, 1, 13, 23, 20, 2, 422000,
+                                  tzinfo=timezone.utc),
+    'day': datetime.date(2020, 1, 13),
+    'detail': gettext_lazy('Not found.'),
+    'genre': [{'name': 'Драма', 'slug': 'drama'}],
+    10: 'числовой ключ',
+}
+
+
+class TestFastJSONRenderer:
+
+    def test_output_matches_drf(self):
+        assert FastJSONRenderer().render(SAMPLE) == \
+            JSONRenderer().render(SAMPLE)
+
+    def test_indent_uses_drf(self):
+        media_type = 'application/json; indent=2'
+        assert FastJSONRenderer().render(SAMPLE, media_type) == \
+            JSONRenderer().render(SAMPLE, media_type)
+
+    def test_fallback_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+
+        assert FastJSONRenderer().render(SAMPLE) == \
+            JSONRenderer().render(SAMPLE)
+
+
+class TestFastJSONParser:
+
+    def test_parse(self):
+        data = FastJSONParser().parse(
+            io.BytesIO('{"text": "Отзыв", "score": 7}'.encode())
+        )
+
+        assert data == {'text': 'Отзыв', 'score': 7}
+
+    def test_invalid_json(self):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"score": NaN}'))
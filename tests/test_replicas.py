@@ -0,0 +1,82 @@
+import pytest
+from django.db import transaction
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import Category
+from api_yamdb import replicas
+from api_yamdb.replicas import PIN_COOKIE, ReplicaRouter
+
+
+def slugs(response):
+    return [item['slug'] for item in response.json()['results']]
+
+
+# Тесты в транзакции всегда читают основную базу, поэтому без обертки
+@pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+class TestReplicaRouting:
+
+    def test_safe_requests_read_replica(self, client, replica):
+        response = client.get('/api/v1/categories/')
+
+        assert slugs(response) == ['copy'], \
+            'GET-запросы должны читать из реплики'
+        assert PIN_COOKIE not in response.cookies
+
+    def test_write_pins_client_to_primary(self, admin_client, replica):
+        response = admin_client.post('/api/v1/categories/',
+                                     {'name': 'Книга', 'slug': 'book'})
+
+        assert response.status_code == 201
+        assert Category.objects.filter(slug='book').exists()
+        assert not Category.objects.using('replica').filter(
+            slug='book').exists(), 'Запись должна идти в основную базу'
+        assert response.cookies[PIN_COOKIE]['max-age'] == 5
+
+        response = admin_client.get('/api/v1/categories/')
+        assert sorted(slugs(response)) == ['book', 'movie'], \
+            'После записи клиент должен читать из основной базы'
+
+    def test_write_pins_token_user_without_cookies(self, admin, replica):
+        token = f'Bearer {AccessToken.for_user(admin)}'
+        writer = APIClient(HTTP_AUTHORIZATION=token)
+        writer.post('/api/v1/categories/', {'name': 'Книга', 'slug': 'book'})
+
+        # Клиент с тем же токеном, но без сохраненных cookie
+        reader = APIClient(HTTP_AUTHORIZATION=token)
+        assert sorted(slugs(reader.get('/api/v1/categories/'))) == [
+            'book', 'movie'
+        ], 'Автор записи должен читать из основной базы и без cookie'
+
+        other = APIClient()
+        assert slugs(other.get('/api/v1/categories/')) == ['copy']
+
+    def test_reads_outside_requests_use_primary(self, replica):
+        assert list(Category.objects.values_list('slug', flat=True)) == \
+            ['movie']
+
+    def test_write_switches_request_to_primary(self, replica):
+        router = ReplicaRouter()
+        replicas.state.replica = 'replica'
+        replicas.state.wrote = False
+        try:
+            router.db_for_write(Category)
+            assert router.db_for_read(Category) == 'default'
+        finally:
+            replicas.state.replica = None
+
+    def test_atomic_block_reads_primary(self, replica):
+        router = ReplicaRouter()
+        replicas.state.replica = 'replica'
+        replicas.state.wrote = False
+        try:
+            assert router.db_for_read(Category) == 'replica'
+            with transaction.atomic():
+                assert router.db_for_read(Category) == 'default'
+        finally:
+            replicas.state.replica = None
+
+    def test_no_replicas(self, client, settings, replica):
+        settings.DATABASE_REPLICAS = []
+
+        assert slugs(client.get('/api/v1/categories/')) == ['movie']
@@ -0,0 +1,146 @@
+import pytest
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.pagination import PageNumberPagination
+
+from api.caching import HIT, MISS, generation_key, response_cache_stats
+from api.models import Genre, Review, Title
+from api.ratings import recalculate_ratings
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_list_is_served_from_cache(self, client, catalog,
+                                       django_assert_num_queries):
+        first = client.get('/api/v1/titles/?genre=drama')
+        assert first['X-Cache'] == 'MISS'
+
+        with django_assert_num_queries(1):
+            second = client.get('/api/v1/titles/?genre=drama')
+
+        assert second['X-Cache'] == 'HIT'
+        assert second.content == first.content
+        assert second['ETag'] == first['ETag']
+        assert response_cache_stats() == {HIT: 1, MISS: 1}
+
+
+# Карточки сбрасываются после фиксации транзакции
+@pytest.mark.django_db(transaction=True)
+class TestResponseCacheInvalidation:
+
+    def test_detail_is_invalidated_by_review(self, client, catalog, user):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+        assert client.get(url)['X-Cache'] == 'HIT'
+
+        Review.objects.create(title=catalog[0], author=user, text='a',
+                              score=6)
+        response = client.get(url)
+
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 6
+
+    def test_detail_survives_unrelated_review(self, client, catalog, user):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+
+        Review.objects.create(title=catalog[1], author=user, text='a',
+                              score=6)
+
+        assert client.get(url)['X-Cache'] == 'HIT', \
+            'Отзыв на другое произведение не должен сбрасывать карточку'
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+
+    def test_genre_change_invalidates_detail(self, client, catalog):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+
+        Genre.objects.filter(slug='drama').get().delete()
+        response = client.get(url)
+
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['genre'] == []
+
+    def test_genre_set_invalidates_detail(self, client, catalog):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+
+        catalog[0].genre.add(Genre.objects.get(slug='comedy'))
+
+        assert len(client.get(url).json()['genre']) == 2
+
+    def test_detail_is_invalidated_by_recalculation(self, client, catalog,
+                                                    user):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+        # Массовая вставка не отправляет сигналы
+        Review.objects.bulk_create([
+            Review(title=catalog[0], author=user, text='a', score=4)
+        ])
+
+        recalculate_ratings()
+        response = client.get(url)
+
+        assert response['X-Cache'] == 'MISS', \
+            'Пересчет рейтингов должен сбрасывать карточки произведений'
+        assert response.json()['rating'] == 4
+
+    def test_invalidation_waits_for_commit(self, client, catalog, user):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+        key = generation_key('titles', catalog[0].id)
+        generation = cache.get(key)
+
+        with transaction.atomic():
+            Review.objects.create(title=catalog[0], author=user, text='a',
+                                  score=6)
+            assert cache.get(key) == generation, \
+                'До фиксации параллельное чтение увидит старые данные'
+
+        assert cache.get(key) != generation
+
+    def test_list_page_tracks_its_titles(self, client, catalog, user,
+                                         monkeypatch):
+        monkeypatch.setattr(PageNumberPagination, 'page_size', 2)
+        first_page = client.get('/api/v1/titles/')
+        etag = first_page['ETag']
+        client.get('/api/v1/titles/?page=2')
+
+        Review.objects.create(title=catalog[3], author=user, text='a',
+                              score=6)
+
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, \
+            'Отзыв на произведение с другой страницы не сбрасывает первую'
+        response = client.get('/api/v1/titles/?page=2')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['results'][1]['rating'] == 6
+
+    def test_ranking_follows_reviews(self, client, catalog, user, settings):
+        settings.RANKING_MIN_REVIEWS = 1
+        client.get('/api/v1/titles/top/')
+
+        Review.objects.create(title=catalog[0], author=user, text='a',
+                              score=6)
+
+        assert [title['id'] for title in client.get(
+            '/api/v1/titles/top/'
+        ).json()] == [catalog[0].id]
+
+    def test_non_canonical_keys_are_not_cached(self, client, catalog):
+        url = f'/api/v1/titles/{catalog[0].id}/'
+        client.get(url)
+        client.get(f'/api/v1/titles/0{catalog[0].id}/')
+
+        Title.objects.filter(pk=catalog[0].pk).update(name='Новое')
+
+        response = client.get(f'/api/v1/titles/0{catalog[0].id}/')
+        assert 'X-Cache' not in response
+        assert response.json()['name'] == 'Новое'
+        for path in ('abc', 'zzz', '99999'):
+            assert client.get(f'/api/v1/titles/{path}/').status_code == 404
+        assert not any(
+            cache.get(generation_key('titles', key))
+            for key in ('abc', 'zzz', '99999')
+        ), 'Ответы 404 не должны оставлять ключей в кэше'
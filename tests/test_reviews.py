@@ -0,0 +1,105 @@
+import pytest
+
+from api.models import Review
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def test_second_review_is_rejected(self, user_client, catalog,
+                                       django_assert_max_num_queries):
+        url = f'/api/v1/titles/{catalog[0].id}/reviews/'
+        response = user_client.post(url, {'text': 'Первый', 'score': 8})
+        assert response.status_code == 201
+        assert response.json()['text'] == 'Первый'
+
+        response = user_client.post(url, {'text': 'Второй', 'score': 2})
+
+        assert response.status_code == 400, \
+            'Повторный отзыв автора на произведение должен отклоняться'
+        assert Review.objects.filter(title=catalog[0]).count() == 1
+        catalog[0].refresh_from_db()
+        assert catalog[0].rating == 8
+
+    def test_create_has_no_duplicate_precheck(self, user_client, catalog):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            user_client.post(f'/api/v1/titles/{catalog[0].id}/reviews/',
+                             {'text': 'Отзыв', 'score': 5})
+
+        assert not any(
+            'COUNT(' in query['sql'] and 'api_review' in query['sql']
+            for query in queries
+        ), 'Создание отзыва не должно проверять дубликаты отдельным запросом'
+
+
+@pytest.mark.django_db
+class TestNestedResources:
+
+    def test_review_list_queries(self, client, discussion,
+                                 django_assert_num_queries):
+        title, _ = discussion
+
+        # COUNT и страница с авторами, без отдельной проверки произведения
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+
+        assert response.json()['count'] == 5
+        assert response.json()['results'][0]['title'] == title.name
+
+    def test_comment_list_queries(self, client, discussion,
+                                  django_assert_num_queries):
+        title, reviews = discussion
+        url = f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/'
+
+        with django_assert_num_queries(2):
+            response = client.get(url)
+
+        assert response.json()['results'][0]['author'] == 'critic0'
+
+    def test_empty_list_checks_parent(self, client, catalog, discussion,
+                                      django_assert_num_queries):
+        # Пустая страница: COUNT и проверка самого произведения
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{catalog[1].id}/reviews/')
+
+        assert response.status_code == 200
+        assert response.json()['results'] == []
+
+    def test_detail_resolves_chain_in_one_query(self, client, discussion,
+                                                django_assert_num_queries):
+        title, reviews = discussion
+        review = reviews[0]
+        comment = review.comments.get()
+
+        with django_assert_num_queries(1):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+            )
+        assert response.json()['author'] == 'critic0'
+
+        with django_assert_num_queries(1):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                f'comments/{comment.id}/'
+            )
+        assert response.json()['text'] == 'Ответ'
+
+    def test_foreign_chain_is_not_found(self, client, catalog, discussion):
+        _, reviews = discussion
+        other = catalog[1].id
+        review = reviews[0]
+        comment = review.comments.get()
+
+        assert client.get(f'/api/v1/titles/{other}/reviews/{review.id}/') \
+            .status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{other}/reviews/{review.id}/comments/'
+        ).status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{other}/reviews/{review.id}/'
+            f'comments/{comment.id}/'
+        ).status_code == 404
+        assert client.get('/api/v1/titles/999/reviews/').status_code == 404
@@ -0,0 +1,46 @@
+import pytest
+
+from api.models import Comment, Review, Title
+from api.serializers import (CommentListSerializer, CommentSerializer,
+                             ReviewListSerializer, ReviewSerializer,
+                             TitleListSerializer, TitleSerializer)
+
+
+@pytest.fixture
+def reviewed(catalog, user):
+    catalog[1].category = None
+    catalog[1].save()
+    review = Review.objects.create(title=catalog[0], author=user,
+                                   text='Отзыв', score=7)
+    Comment.objects.create(review=review, author=user, text='Ответ')
+    return catalog
+
+
+@pytest.mark.django_db
+class TestListSerializers:
+
+    @pytest.mark.parametrize('full, light, queryset', [
+        (TitleSerializer, TitleListSerializer,
+         lambda: Title.objects.select_related('category').prefetch_related(
+             'genre')),
+        (ReviewSerializer, ReviewListSerializer,
+         lambda: Review.objects.select_related('author', 'title')),
+        (CommentSerializer, CommentListSerializer,
+         lambda: Comment.objects.select_related('author')),
+    ])
+    def test_output_matches_model_serializer(self, reviewed, full, light,
+                                             queryset):
+        objects = list(queryset())
+
+        assert light(objects, many=True).data == \
+            full(objects, many=True).data, \
+            f'{light.__name__} должен отдавать то же, что {full.__name__}'
+
+    def test_list_endpoint_uses_light_serializer(self, client, reviewed):
+        response = client.get('/api/v1/titles/')
+
+        results = response.json()['results']
+        assert [list(item) for item in results] == [list(
+            TitleSerializer.Meta.fields
+        )] * len(reviewed)
+        assert results[1]['category'] is None
@@ -0,0 +1,73 @@
+import pytest
+
+from api.models import Category, Genre, Title
+
+
+@pytest.mark.django_db
+class TestTitleList:
+
+    def test_title_list_query_count(self, client, django_assert_num_queries):
+        movie = Category.objects.create(name='Фильм', slug='movie')
+        genres = [
+            Genre.objects.create(name=f'Жанр {number}', slug=f'g{number}')
+            for number in range(3)
+        ]
+        for number in range(100):
+            title = Title.objects.create(name=f'Фильм {number}', year=2000,
+                                         category=movie)
+            title.genre.set(genres)
+
+        # Версии таблиц для ETag, COUNT для пагинации, сами произведения
+        # и жанры одним запросом
+        with django_assert_num_queries(4):
+            response = client.get('/api/v1/titles/')
+
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert len(results) == 100
+        assert results[0]['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert results[0]['genre'] == [
+            {'name': genre.name, 'slug': genre.slug} for genre in genres
+        ]
+
+    def test_title_detail_query_count(self, client, catalog,
+                                      django_assert_num_queries):
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/{catalog[1].id}/')
+
+        assert response.status_code == 200
+        assert response.json() == {
+            'id': catalog[1].id,
+            'name': 'Произведение 1',
+            'year': 1991,
+            'rating': None,
+            'description': 'Описание',
+            'genre': [{'name': 'Драма', 'slug': 'drama'},
+                      {'name': 'Комедия', 'slug': 'comedy'}],
+            'category': {'name': 'Фильм', 'slug': 'movie'},
+        }
+
+
+@pytest.mark.django_db
+class TestTitleFilters:
+
+    def test_slug_filters_are_exact(self, client, catalog):
+        Genre.objects.create(name='Драматургия', slug='drama-theatre')
+
+        response = client.get('/api/v1/titles/?genre=dram')
+        assert response.json()['count'] == 0, \
+            'Фильтр по жанру должен сравнивать slug целиком'
+
+        response = client.get('/api/v1/titles/?genre=comedy')
+        assert response.json()['count'] == 2
+
+    def test_search_by_name_and_description(self, client, catalog):
+        Title.objects.create(name='Зеленая миля', description='Тюрьма')
+
+        response = client.get('/api/v1/titles/?search=миля')
+        assert [item['name'] for item in response.json()['results']] == \
+            ['Зеленая миля']
+
+        response = client.get('/api/v1/titles/?search=Тюрьма')
+        assert response.json()['count'] == 1, \
+            'Поиск должен учитывать описание произведения'